@@ -1,18 +1,29 @@
 import streamlit as st
+import os
+import random
+import sys
 import time
-from datetime import datetime
-import cv2
-import numpy as np
-from deepface import DeepFace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from components.todo import ToDo
-from components.qa_generator import QAGenerator
-from components.llm import OllamaLLM
-from database_mongodb import EmotionDatabase
+from components.camera import CameraCapture
+from components.emotion_worker import current_emotion_service, get_emotion_service
+from components.mood_tracker import MoodTracker
+from components.url_ingestion import parse_url_input
+from components.model_registry import current_embedding_cache, get_ollama_llm, registry
+from components.session_manager import current_session_manager, get_session_manager
+from components.warmup import start_warmup
 from logger import logger
+from metrics import start_exporters
 import streamlit.components.v1 as components
 import base64
+import uuid
+
+STUDY_GUIDE_WORKERS = int(os.getenv("SIDEKICK_STUDY_GUIDE_WORKERS", "4"))
 
 def init_session_state():
+    # Exporters are process-wide and start only once.
+    start_exporters()
     if 'page' not in st.session_state:
         st.session_state.page = 'welcome'
     if 'current_emotion' not in st.session_state:
@@ -23,16 +34,34 @@ def init_session_state():
         st.session_state.emotion_messages = []
     if 'completed_tasks' not in st.session_state:
         st.session_state.completed_tasks = set()
-    if 'qa_generator' not in st.session_state:
-        st.session_state.qa_generator = QAGenerator()
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = get_user_id()
     if 'todo' not in st.session_state:
         st.session_state.todo = ToDo()
-    if 'emotion_db' not in st.session_state:
-        st.session_state.emotion_db = EmotionDatabase()
-    if 'llm' not in st.session_state:
-        st.session_state.llm = OllamaLLM()
+    if 'study_guides' not in st.session_state:
+        st.session_state.study_guides = {}
     if 'camera_on' not in st.session_state:
         st.session_state.camera_on = True  
+    if 'camera' not in st.session_state:
+        st.session_state.camera = CameraCapture()
+    if 'emotion_future' not in st.session_state:
+        st.session_state.emotion_future = None
+    if 'detected_emotion' not in st.session_state:
+        st.session_state.detected_emotion = None
+
+def init_study_resources():
+    """Create the heavy per-session objects; only the study, prep and history pages need them"""
+    if 'qa_generator' not in st.session_state:
+        from components.qa_generator import QAGenerator
+        st.session_state.qa_generator = QAGenerator(user_id=st.session_state.user_id)
+    if 'emotion_db' not in st.session_state:
+        from database_mongodb import EmotionDatabase
+        st.session_state.emotion_db = EmotionDatabase(user_id=st.session_state.user_id)
+    if 'mood_tracker' not in st.session_state:
+        st.session_state.mood_tracker = MoodTracker()
+        st.session_state.mood_tracker.rehydrate(st.session_state.emotion_db.get_recent_emotion_records(minutes=5))
+    if 'llm' not in st.session_state:
+        st.session_state.llm = get_ollama_llm()
 
 def get_emotion_response(emotion: str) -> str:
     """Generate appropriate response based on detected emotion"""
@@ -56,33 +85,52 @@ def celebrate_completion():
         "🏆 Task completed! Keep up this amazing momentum!",
         "✨ Well done! You're getting closer to your goals!"
     ]
-    return np.random.choice(celebrations)
+    return random.choice(celebrations)
+
+def poll_emotion_result(frame_rgb=None):
+    """Collect the emotion worker's result if it finished and queue frame_rgb for analysis; never blocks"""
+    new_emotion = None
+    future = st.session_state.emotion_future
+    if future is not None and future.done():
+        st.session_state.emotion_future = None
+        if not future.cancelled():
+            try:
+                new_emotion = future.result()
+                st.session_state.detected_emotion = new_emotion
+            except Exception as e:
+                logger.error(f"Error in emotion analysis: {e}")
+    if frame_rgb is not None and st.session_state.emotion_future is None:
+        st.session_state.emotion_future = get_emotion_service().submit(frame_rgb)
+    return new_emotion
 
 def capture_and_analyze_emotion():
     """Capture and analyze emotion, return appropriate response"""
     current_time = time.time()
     
-    if (current_time - st.session_state.last_emotion_check) >= 30:
-        try:
-            cap = cv2.VideoCapture(0)
-            ret, frame = cap.read()
-            cap.release()
-            
-            if ret:
+    try:
+        import cv2
+        frame_rgb = None
+        if (current_time - st.session_state.last_emotion_check) >= 30:
+            frame = st.session_state.camera.latest_frame()
+            if frame is not None:
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                result = DeepFace.analyze(frame_rgb, actions=['emotion'], enforce_detection=False)
-                emotion = result[0]['dominant_emotion']
-                if emotion != st.session_state.current_emotion:
-                    st.session_state.current_emotion = emotion
-                    response = get_emotion_response(emotion)
-                    st.session_state.emotion_messages.append(response)
-                    st.session_state.emotion_db.insert_emotion(emotion)
-                
                 st.session_state.last_emotion_check = current_time
-                return emotion, frame_rgb
-                
-        except Exception as e:
-            logger.error(f"Error in emotion capture: {e}")
+
+        emotion = poll_emotion_result(frame_rgb)
+        if emotion:
+            st.session_state.mood_tracker.record(emotion)
+            if emotion != st.session_state.current_emotion:
+                st.session_state.current_emotion = emotion
+                response = get_emotion_response(emotion)
+                st.session_state.emotion_messages.append(response)
+                st.session_state.emotion_db.insert_emotion(emotion)
+            
+            frame = st.session_state.camera.latest_frame()
+            if frame is not None:
+                return emotion, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            
+    except Exception as e:
+        logger.error(f"Error in emotion capture: {e}")
     return None, None
 
 def study_session_page():
@@ -113,35 +161,129 @@ def study_session_page():
         st.markdown("### 💡 Study Assistant")
         user_message = st.text_input("Ask me anything about your studies...")
         if user_message:
-            with st.spinner("Thinking..."):
-                emotion_context = f"The student is feeling {st.session_state.current_emotion}. " if st.session_state.current_emotion else ""
-                response = st.session_state.llm._call(f"{emotion_context}{user_message}")
-                st.markdown(f"**Assistant:** {response}")
+            emotion_context = f"The student is feeling {st.session_state.current_emotion}. " if st.session_state.current_emotion else ""
+            st.markdown("**Assistant:**")
+            st.write_stream(st.session_state.llm.stream(f"{emotion_context}{user_message}",
+                                                        semantic_text=user_message))
     
     with qa_col:
-        st.markdown("### 🤖 Course Assistant")
-        
-        input_type = st.selectbox("Select input type", ["Text", "PDF", "URL"])
-        
-        if input_type == "Text":
-            user_input = st.text_area("Enter study material")
-            if st.button("Process"):
-                st.session_state.qa_generator.process_documents("Text", user_input)
-        
-        elif input_type == "PDF":
-            uploaded_file = st.file_uploader("Upload PDF", type=['pdf'])
-            if uploaded_file and st.button("Process"):
-                st.session_state.qa_generator.process_documents("PDF", uploaded_file)
-        
-        elif input_type == "URL":
-            url = st.text_input("Enter URL")
-            if st.button("Process"):
-                st.session_state.qa_generator.process_documents("URL", url)
-        
-        question = st.text_input("Ask a question about your material")
-        if question and st.button("Get Answer"):
-            answer = st.session_state.qa_generator.create_response(question)
-            st.write("Answer:", answer)
+        course_assistant_panel()
+
+@st.fragment(run_every=1.0)
+def ingestion_progress():
+    """Show the progress of the background PDF ingestion, refreshing every second while it runs"""
+    job = st.session_state.ingestion_job
+    if job.running:
+        st.progress(job.progress, text=f"Indexed {job.pages_done}/{job.total_pages or '?'} pages "
+                                       f"({job.chunks_indexed} chunks). You can already ask questions.")
+    else:
+        # A full rerun reports the result and stops this fragment's refresh.
+        st.rerun()
+
+def ingestion_result(job):
+    """Report a finished PDF ingestion"""
+    if job.error:
+        st.error(f"Failed to index {job.source}: {job.error}")
+    else:
+        st.success(f"Indexed {job.source}: {job.total_pages} pages, {job.chunks_indexed} chunks "
+                   f"in {job.finished_at - job.started_at:.1f}s.")
+
+def course_assistant_panel():
+    st.markdown("### 🤖 Course Assistant")
+    qa_generator = st.session_state.qa_generator
+    busy = qa_generator.busy
+
+    course = st.text_input("Course", value=qa_generator.course_id, disabled=busy)
+    if course and course != qa_generator.course_id:
+        qa_generator.set_course(course)
+    
+    input_type = st.selectbox("Select input type", ["Text", "PDF", "URL"])
+    
+    if input_type == "Text":
+        title = st.text_input("Title", value="My notes")
+        user_input = st.text_area("Enter study material")
+        if st.button("Process", disabled=busy):
+            qa_generator.process_documents("Text", user_input, source=title)
+    
+    elif input_type == "PDF":
+        uploaded_file = st.file_uploader("Upload PDF", type=['pdf'])
+        if uploaded_file and st.button("Process", disabled=busy):
+            st.session_state.ingestion_job = qa_generator.start_pdf_ingestion(uploaded_file)
+    
+    elif input_type == "URL":
+        url_input = st.text_area("Enter URLs or a sitemap (one per line)")
+        if st.button("Process", disabled=busy):
+            urls = parse_url_input(url_input)
+            if not urls:
+                st.error("Please enter at least one http(s) URL.")
+            else:
+                try:
+                    with st.spinner(f"Fetching {len(urls)} URL(s)..."):
+                        summary = qa_generator.ingest_urls(urls)
+                except Exception as e:
+                    logger.error(f"Error creating index from URLs: {e}")
+                    st.error(f"Failed to create index from the provided URLs: {str(e)}")
+                else:
+                    st.info(f"{summary['pages']} pages: {summary['changed']} updated "
+                            f"({summary['chunks_added']} new chunks), {summary['unchanged']} unchanged, "
+                            f"{summary['failed']} failed.")
+
+    job = st.session_state.get('ingestion_job')
+    if job is not None:
+        if job.running:
+            ingestion_progress()
+        else:
+            ingestion_result(st.session_state.pop('ingestion_job'))
+
+    sources = qa_generator.list_sources()
+    if sources:
+        with st.expander(f"📚 Indexed materials ({len(sources)})"):
+            for source, chunk_count in sources.items():
+                source_col, remove_col = st.columns([3, 1])
+                source_col.write(f"{source} ({chunk_count} chunks)")
+                if remove_col.button("Remove", key=f"remove_{source}"):
+                    qa_generator.remove_source(source)
+                    st.rerun()
+    
+    question = st.text_input("Ask a question about your material")
+    if question and st.button("Get Answer"):
+        answer = qa_generator.create_response(question)
+        st.write("Answer:", answer)
+
+def get_session_id():
+    """Return the id Streamlit gives this browser session (the user id outside the Streamlit runtime)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else st.session_state.user_id
+
+def session_state_bytes():
+    """Rough size of the session state kept besides the course index"""
+    total = sum(len(guide) for guide in st.session_state.study_guides.values())
+    todo_list = st.session_state.get('todo_list')
+    if todo_list is not None:
+        total += int(todo_list.memory_usage(deep=True).sum())
+    return total
+
+def track_session():
+    """Register this run with the session manager, which reopens the index if it was evicted while idle"""
+    on_close = [st.session_state.camera.stop]
+    if st.session_state.get('emotion_db') is not None:
+        on_close.append(st.session_state.emotion_db.close_connection)
+    get_session_manager().touch(
+        get_session_id(),
+        st.session_state.user_id,
+        qa_generator=st.session_state.get('qa_generator'),
+        state_bytes=session_state_bytes(),
+        on_close=on_close
+    )
+
+def get_user_id():
+    """Return the id of the current student, kept in the URL so they get their index back on return"""
+    user_id = st.query_params.get("user")
+    if not user_id:
+        user_id = uuid.uuid4().hex[:12]
+        st.query_params["user"] = user_id
+    return user_id
 
 def set_page_config():
     st.set_page_config(
@@ -236,15 +378,59 @@ def goals_page():
     
     st.session_state.todo.display_tasks()
 
-def generate_study_guide(task):
-    prompt = f"""Create a comprehensive study guide for: {task}
+def study_guide_prompt(task):
+    return f"""Create a comprehensive study guide for: {task}
     Include:
     1. Key topics to cover
     2. Suggested study approach
     3. Recommended resources
     4. Time management tips
     """
-    return st.session_state.llm._call(prompt)
+
+def generate_study_guide(task):
+    return st.session_state.llm._call(study_guide_prompt(task), semantic_text=task)
+
+def stream_study_guide(task, outcome):
+    """Yield the study guide for a task token by token; `outcome["complete"]` is set once it finished cleanly"""
+    outcome["complete"] = False
+    for chunk in st.session_state.llm._stream(study_guide_prompt(task), semantic_text=task):
+        if chunk.generation_info and chunk.generation_info.get("done"):
+            outcome["complete"] = True
+        yield chunk.text
+
+def generate_study_guides(tasks):
+    """
+    Generate study guides for several tasks on a bounded worker pool, yielding (task, guide, error)
+    as each finishes. Workers have no Streamlit context, so failures are returned for the caller to show.
+    """
+    from components.llm import FALLBACK_RESPONSE
+    llm = st.session_state.llm
+
+    def generate(task):
+        guide = llm.invoke(study_guide_prompt(task), semantic_text=task)
+        if not guide or guide == FALLBACK_RESPONSE:
+            raise RuntimeError("the assistant could not be reached")
+        return guide
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(STUDY_GUIDE_WORKERS, len(tasks))))
+    try:
+        futures = {executor.submit(generate, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                yield task, future.result(), None
+            except Exception as e:
+                logger.error(f"Error generating study guide for '{task}': {e}")
+                yield task, None, e
+    finally:
+        # A rerun or page switch closes this generator; don't hold the script thread
+        # until every queued request has been answered.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def save_study_guide(task, guide):
+    from components.llm import FALLBACK_RESPONSE
+    if guide and guide != FALLBACK_RESPONSE:
+        st.session_state.study_guides[task] = guide
 
 def study_prep_page():
     st.markdown("<h1 class='main-title'>Sidekick</h1>", unsafe_allow_html=True)
@@ -255,11 +441,39 @@ def study_prep_page():
     tasks = st.session_state.todo.get_tasks()
     if tasks:
         selected_task = st.selectbox("Which task would you like to focus on?", tasks)
-        if st.button("Generate Study Guide"):
-            with st.spinner("Creating your personalized study guide..."):
-                study_guide = generate_study_guide(selected_task)
-                st.markdown("### 📋 Your Study Guide")
-                st.write(study_guide)
+        guide_col, all_col = st.columns(2)
+        generate_one = guide_col.button("Generate Study Guide")
+        generate_all = all_col.button("Generate guides for all my tasks")
+
+        if generate_one:
+            st.markdown("### 📋 Your Study Guide")
+            outcome = {}
+            guide = st.write_stream(stream_study_guide(selected_task, outcome))
+            if outcome["complete"]:
+                save_study_guide(selected_task, guide)
+
+        saved_guides = st.session_state.study_guides
+        if saved_guides and not generate_one:
+            st.markdown("### 📋 Your Study Guides")
+            for task in tasks:
+                if task in saved_guides:
+                    with st.expander(task, expanded=(task == selected_task)):
+                        st.write(saved_guides[task])
+
+        if generate_all:
+            pending = [task for task in tasks if task not in saved_guides]
+            if not pending:
+                st.info("All your tasks already have a study guide.")
+            else:
+                progress = st.progress(0.0, text="Creating your study guides...")
+                for done, (task, guide, error) in enumerate(generate_study_guides(pending), start=1):
+                    if error is not None:
+                        st.error(f"Couldn't generate a study guide for '{task}': {error}")
+                    else:
+                        save_study_guide(task, guide)
+                        with st.expander(task, expanded=True):
+                            st.write(guide)
+                    progress.progress(done / len(pending), text=f"{done}/{len(pending)} study guides ready")
         
         if st.button("Begin Study Session"):
             st.session_state.page = 'study_session'
@@ -272,16 +486,16 @@ def study_prep_page():
 
 def capture_emotion():
     try:
-        cap = cv2.VideoCapture(0)
-        ret, frame = cap.read()
-        cap.release()
+        import cv2
+        frame = st.session_state.camera.latest_frame()
         
-        if ret:
+        if frame is not None:
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = DeepFace.analyze(frame_rgb, actions=['emotion'], enforce_detection=False)
-            emotion = result[0]['dominant_emotion']
-            st.session_state.emotion_db.insert_emotion(emotion)
-            return emotion, frame_rgb
+            new_emotion = poll_emotion_result(frame_rgb)
+            if new_emotion:
+                st.session_state.mood_tracker.record(new_emotion)
+                st.session_state.emotion_db.insert_emotion(new_emotion)
+            return st.session_state.detected_emotion, frame_rgb
     except Exception as e:
         logger.error(f"Error in emotion capture: {e}")
     return None, None
@@ -297,49 +511,159 @@ def study_session_page():
         
         if st.button("Toggle Camera"):
             st.session_state.camera_on = not st.session_state.camera_on
+            if not st.session_state.camera_on:
+                st.session_state.camera.stop()
         
         if st.session_state.camera_on:
             emotion, frame = capture_emotion()
             if emotion and frame is not None:
                 st.image(frame, channels="RGB", use_container_width=True)
                 st.write(f"Current emotion: {emotion}")
+            dominant_emotion, share = st.session_state.mood_tracker.dominant()
+            if dominant_emotion:
+                st.write(f"Mood over the last 5 minutes: {dominant_emotion} ({share:.0%})")
     
     with main_col:
         st.markdown("### 💭 Study Chat")
         user_message = st.text_input("Ask me anything about your studies...")
         if user_message:
-            with st.spinner("Thinking..."):
-                response = st.session_state.llm._call(user_message)
-                st.markdown(f"**Assistant:** {response}")
+            st.markdown("**Assistant:**")
+            st.write_stream(st.session_state.llm.stream(user_message))
     
     with qa_col:
-        st.markdown("### 🤖 Course Assistant")
-        
-        input_type = st.selectbox("Select input type", ["Text", "PDF", "URL"])
-        
-        if input_type == "Text":
-            user_input = st.text_area("Enter study material")
-            if st.button("Process"):
-                st.session_state.qa_generator.process_documents("Text", user_input)
-        
-        elif input_type == "PDF":
-            uploaded_file = st.file_uploader("Upload PDF", type=['pdf'])
-            if uploaded_file and st.button("Process"):
-                st.session_state.qa_generator.process_documents("PDF", uploaded_file)
-        
-        elif input_type == "URL":
-            url = st.text_input("Enter URL")
-            if st.button("Process"):
-                st.session_state.qa_generator.process_documents("URL", url)
-        
-        question = st.text_input("Ask a question about your material")
-        if question and st.button("Get Answer"):
-            answer = st.session_state.qa_generator.create_response(question)
-            st.write("Answer:", answer)
+        course_assistant_panel()
+
+def created_singleton(module_name, accessor):
+    """Return a process-wide helper if its module already created it, without importing the module"""
+    module = sys.modules.get(module_name)
+    return getattr(module, accessor)() if module is not None else None
+
+def model_status_sidebar():
+    """Show load time and approximate memory of the shared models"""
+    with st.sidebar.expander("⚙️ Model status"):
+        stats = registry.stats()
+        if not stats:
+            st.write("No models loaded yet.")
+        for name, model_stats in stats.items():
+            st.write(
+                f"**{name}**: loaded in {model_stats['load_seconds']:.2f}s, "
+                f"~{model_stats['memory_bytes'] / (1024 * 1024):.1f} MiB"
+            )
+        warmup = start_warmup()
+        if warmup is not None and warmup.running:
+            st.write("**Warm-up**: loading models in the background...")
+        elif warmup is not None:
+            st.write(f"**Warm-up**: done in {warmup.finished_at - warmup.started_at:.1f}s"
+                     + (f", failed steps: {', '.join(warmup.errors)}" if warmup.errors else ""))
+        transport = created_singleton("components.http_transport", "current_transport")
+        if transport is not None:
+            latency = transport.stats.summary()
+            st.write(
+                f"**Ollama requests**: {latency['requests']} ({latency['errors']} errors), "
+                f"p50 {latency['p50_seconds'] * 1000:.0f} ms, p95 {latency['p95_seconds'] * 1000:.0f} ms"
+            )
+        response_cache = created_singleton("components.response_cache", "current_response_cache")
+        if response_cache is not None:
+            cache_stats = response_cache.stats()
+            st.write(
+                f"**Response cache**: {cache_stats['entries']} entries, "
+                f"{cache_stats['exact_hits']} exact / {cache_stats['semantic_hits']} similar hits, "
+                f"{cache_stats['misses']} misses"
+            )
+        if st.session_state.get('qa_generator') is not None:
+            answer_stats = st.session_state.qa_generator.answer_cache.stats()
+            st.write(
+                f"**Answer cache**: {answer_stats['entries']} entries, "
+                f"{answer_stats['exact_hits']} hits, {answer_stats['misses']} misses"
+            )
+        if current_session_manager() is not None:
+            session_stats = current_session_manager().stats()
+            st.write(
+                f"**Sessions**: {session_stats['sessions']} live ({session_stats['loaded']} loaded, "
+                f"{session_stats['evicted']} evicted), indexes "
+                f"~{session_stats['footprint_bytes'] / (1024 * 1024):.1f}/"
+                f"{session_stats['budget_bytes'] / (1024 * 1024):.0f} MiB, "
+                f"process {session_stats['rss_bytes'] / (1024 * 1024):.0f} MiB"
+            )
+        emotion_service = current_emotion_service()
+        if emotion_service is not None:
+            latency = emotion_service.stats.summary()
+            st.write(
+                f"**Emotion inference**: {latency['requests']} frames, "
+                f"p50 {latency['p50_seconds'] * 1000:.0f} ms, p95 {latency['p95_seconds'] * 1000:.0f} ms, "
+                f"queue {emotion_service.queue_depth}, dropped {emotion_service.dropped}"
+            )
+        emotion_db = st.session_state.get('emotion_db')
+        write_stats = emotion_db.write_stats() if emotion_db is not None else {}
+        if write_stats:
+            st.write(
+                f"**Emotion writes**: {write_stats['written']} written, queue {write_stats['queue_depth']}, "
+                f"last flush {write_stats['last_flush_seconds'] * 1000:.0f} ms"
+            )
+        if emotion_db is not None and emotion_db.client is not None:
+            from database_mongodb import mongo_connection_stats
+            connections = mongo_connection_stats()
+            st.write(
+                f"**MongoDB connections**: {connections['open']} open, {connections['in_use']} in use, "
+                f"{connections['checkout_failures']} checkout failures"
+            )
+        if current_embedding_cache() is not None:
+            cache_stats = current_embedding_cache().stats()
+            st.write(
+                f"**Embedding cache**: {cache_stats['entries']}/{cache_stats['capacity']} vectors, "
+                f"{cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%} hit rate)"
+            )
+
+HISTORY_RANGES = {
+    "Last 24 hours": (timedelta(days=1), "hour"),
+    "Last 7 days": (timedelta(days=7), "hour"),
+    "Last 4 weeks": (timedelta(weeks=4), "day"),
+    "Last 6 months": (timedelta(days=182), "day"),
+}
+
+def history_page():
+    st.markdown("<h1 class='main-title'>Sidekick</h1>", unsafe_allow_html=True)
+    st.markdown("### 📈 Your mood history")
+
+    range_label = st.selectbox("Show", list(HISTORY_RANGES), index=1)
+    span, granularity = HISTORY_RANGES[range_label]
+
+    started = time.perf_counter()
+    history = st.session_state.emotion_db.get_mood_history(
+        granularity=granularity, start=datetime.utcnow() - span
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not history:
+        st.info("No mood history recorded yet. Turn on the camera during a study session to start tracking.")
+    else:
+        import pandas as pd
+        counts = pd.DataFrame(
+            [row.get("counts", {}) for row in history],
+            index=pd.to_datetime([row["bucket"] for row in history])
+        ).fillna(0)
+        shares = counts.div(counts.sum(axis=1), axis=0)
+        st.bar_chart(shares)
+        totals = counts.sum().sort_values(ascending=False)
+        st.write(f"Most common mood: **{totals.index[0]}** "
+                 f"({totals.iloc[0] / totals.sum():.0%} of {int(totals.sum())} detections)")
+        st.caption(f"Loaded {len(history)} {granularity} buckets in {elapsed_ms:.0f} ms")
+
+    if st.button("Back"):
+        change_page(st.session_state.get('previous_page', 'welcome'))
 
 def main():
     init_session_state()
     set_page_config()
+    start_warmup()
+    if st.session_state.page in ('study_prep', 'study_session', 'history'):
+        init_study_resources()
+    track_session()
+    model_status_sidebar()
+    if st.session_state.page != 'history' and st.sidebar.button("📈 Mood history"):
+        st.session_state.previous_page = st.session_state.page
+        change_page('history')
     
     if st.session_state.page == 'welcome':
         welcome_page()
@@ -349,6 +673,8 @@ def main():
         study_prep_page()
     elif st.session_state.page == 'study_session':
         study_session_page()
+    elif st.session_state.page == 'history':
+        history_page()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+End-to-end latency and throughput benchmarks that run without any live service.
+
+    python benchmarks/bench_e2e.py --token-rate 200 --output e2e.json
+    python benchmarks/bench_e2e.py --mongo-uri mongodb://localhost:27017 --embeddings minilm
+
+Ollama and the HuggingFace QA endpoint are replaced by a local fake server
+(`benchmarks/fakes.py`) that generates `--tokens` tokens at `--token-rate` tokens/s.
+MongoDB is mongomock (`pip install -r benchmarks/requirements.txt`) unless
+`--mongo-uri` points at a real (local) mongod. Embeddings are hashed
+bag-of-words vectors unless `--embeddings minilm` loads the real model.
+
+Scenarios, each reported with p50/p95/p99 latency and throughput:
+- ingestion: `QAGenerator.process_documents` on synthetic course notes
+- retrieval: the course retriever alone
+- qa: `QAGenerator.create_response` with the answer cache cleared before each call,
+  then again once the cache has been warmed by a full pass
+- chat / chat_stream: `OllamaLLM` completions and time to first streamed token
+- emotion_write: `EmotionDatabase.insert_emotion`, buffered and unbuffered
+
+Answers that are empty or one of the app's fallback/error messages are counted as
+`failures`; a broken backend fails fast and would otherwise look like a fast one.
+The script exits with status 1 if any call failed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import WORDS, FakeServiceServer, HashEmbeddings  # noqa: E402
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "retrieval_eval.json")
+
+
+def summarize(latencies: list, items: int = None, wall_seconds: float = None) -> dict:
+    """Percentiles of `latencies` (seconds) plus throughput in operations (or `items`) per second."""
+    samples = sorted(latencies)
+
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000 if samples else 0.0
+
+    wall_seconds = wall_seconds if wall_seconds is not None else sum(samples)
+    return {
+        "operations": len(samples),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "throughput_per_second": (items if items is not None else len(samples)) / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+def synthetic_documents(count: int, words: int, seed: int = 0) -> list:
+    """Course-note-like documents mixing the evaluation chunks with filler text."""
+    with open(EVAL_PATH) as f:
+        facts = [chunk["text"] for chunk in json.load(f)["chunks"]]
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        parts = []
+        while sum(len(part.split()) for part in parts) < words:
+            parts.append(rng.choice(facts) if rng.random() < 0.3 else " ".join(rng.choices(WORDS, k=40)) + ".")
+        documents.append("\n\n".join(parts))
+    return documents
+
+
+def bench_ingestion(qa, documents: list) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for i, text in enumerate(documents):
+        call_started = time.perf_counter()
+        qa.process_documents("Text", text, source=f"bench-doc-{i}")
+        latencies.append(time.perf_counter() - call_started)
+    wall = time.perf_counter() - started
+    result = summarize(latencies, wall_seconds=wall)
+    result["chunks"] = qa._count()
+    result["chunks_per_second"] = result["chunks"] / wall if wall else 0.0
+    return result
+
+
+def bench_retrieval(qa, queries: list, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            qa.retriever.invoke(query)
+            latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def is_failure(answer: str) -> bool:
+    """True for empty answers and the fallback/error messages the app shows instead of one."""
+    from components.llm import FALLBACK_RESPONSE
+    from components.qa_generator import ERROR_RESPONSE, NO_ANSWER, QA_ERROR_RESPONSE
+    return not answer or answer.strip() in (FALLBACK_RESPONSE, ERROR_RESPONSE, NO_ANSWER, QA_ERROR_RESPONSE)
+
+
+def bench_qa(qa, queries: list, repeat: int) -> dict:
+    latencies, failures = [], 0
+    for _ in range(repeat):
+        for query in queries:
+            qa.answer_cache.clear()
+            started = time.perf_counter()
+            failures += is_failure(qa.create_response(query))
+            latencies.append(time.perf_counter() - started)
+
+    # Warm the cache with one full pass, then time the cached answers.
+    qa.answer_cache.clear()
+    for query in queries:
+        failures += is_failure(qa.create_response(query))
+    hits_before = qa.answer_cache.stats()["exact_hits"]
+    cached = []
+    for query in queries:
+        started = time.perf_counter()
+        failures += is_failure(qa.create_response(query))
+        cached.append(time.perf_counter() - started)
+    result = summarize(latencies)
+    result["failures"] = failures
+    result["cached"] = summarize(cached)
+    result["cached"]["cache_hits"] = qa.answer_cache.stats()["exact_hits"] - hits_before
+    return result
+
+
+def bench_chat(llm, prompts: list) -> dict:
+    latencies, failures = [], 0
+    for prompt in prompts:
+        started = time.perf_counter()
+        failures += is_failure(llm.invoke(prompt))
+        latencies.append(time.perf_counter() - started)
+    result = summarize(latencies)
+    result["failures"] = failures
+    return result
+
+
+def bench_chat_stream(llm, prompts: list) -> dict:
+    first_token, total, tokens, failures = [], [], 0, 0
+    for prompt in prompts:
+        started = time.perf_counter()
+        text = []
+        for chunk in llm.stream(prompt):
+            if not chunk:
+                continue  # the empty end-of-stream marker
+            if not text:
+                first_token.append(time.perf_counter() - started)
+            text.append(chunk)
+            tokens += 1
+        total.append(time.perf_counter() - started)
+        failures += is_failure("".join(text))
+    result = summarize(total, items=tokens)
+    result["failures"] = failures
+    result["time_to_first_token"] = summarize(first_token)
+    return result
+
+
+def bench_emotion_writes(database_cls, uri: str, records: int, buffered: bool) -> dict:
+    database = database_cls(uri=uri, buffered=buffered, user_id=f"bench-{time.time_ns()}")
+    emotions = ["happy", "neutral", "sad", "surprise", "angry"]
+    latencies = []
+    started = time.perf_counter()
+    for i in range(records):
+        call_started = time.perf_counter()
+        database.insert_emotion(emotions[i % len(emotions)])
+        latencies.append(time.perf_counter() - call_started)
+    flush_started = time.perf_counter()
+    database.close_connection()
+    wall = time.perf_counter() - started
+    result = summarize(latencies, wall_seconds=wall)
+    result["final_flush_ms"] = (time.perf_counter() - flush_started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens generated per fake completion")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake model tokens per second (0 = instant)")
+    parser.add_argument("--first-token-ms", type=float, default=20.0)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--document-words", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the evaluation queries")
+    parser.add_argument("--chat-requests", type=int, default=20)
+    parser.add_argument("--emotion-records", type=int, default=2000)
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default="numpy")
+    parser.add_argument("--embeddings", choices=("hash", "minilm"), default="hash")
+    parser.add_argument("--mongo-uri", help="Use this MongoDB instead of mongomock")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with FakeServiceServer(args.tokens, args.token_rate, args.first_token_ms) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        # Configuration is read at import time, so point everything at the stand-ins first.
+        os.environ.update({
+            "SIDEKICK_QA_ENDPOINT_URL": f"{server.url}/hf",
+            "HUGGINGFACE_API_KEY": os.getenv("HUGGINGFACE_API_KEY", "bench"),
+            "SIDEKICK_INDEX_DIR": os.path.join(tmp, "indexes"),
+            "SIDEKICK_EMBED_CACHE_DIR": os.path.join(tmp, "embeddings"),
+            "SIDEKICK_HTTP_CACHE_DIR": os.path.join(tmp, "http"),
+        })
+        import database_mongodb
+        from components.llm import OllamaLLM
+        from components.model_registry import EMBEDDING_MODEL_NAME, registry
+        from components.qa_generator import QAGenerator
+
+        if args.embeddings == "hash":
+            registry.register(f"embeddings:{EMBEDDING_MODEL_NAME}", HashEmbeddings())
+        mongo_uri = args.mongo_uri
+        if not mongo_uri:
+            import mongomock
+            database_mongodb.MongoClient = mongomock.MongoClient
+            mongo_uri = "mongodb://mongomock"
+
+        with open(EVAL_PATH) as f:
+            queries = [item["query"] for item in json.load(f)["queries"]]
+        documents = synthetic_documents(args.documents, args.document_words)
+        prompts = [f"Give me a study tip about {query}" for query in queries]
+        prompts = (prompts * (args.chat_requests // len(prompts) + 1))[:args.chat_requests]
+
+        qa = QAGenerator(user_id="bench", course_id="bench", backend=args.backend)
+        llm = OllamaLLM(host=server.url, cache_responses=False)
+        report = {
+            "config": {**vars(args), "python": platform.python_version(), "machine": platform.machine()},
+            "results": {
+                "ingestion": bench_ingestion(qa, documents),
+                "retrieval": bench_retrieval(qa, queries, args.repeat),
+                "qa": bench_qa(qa, queries, args.repeat),
+                "chat": bench_chat(llm, prompts),
+                "chat_stream": bench_chat_stream(llm, prompts),
+                "emotion_write_buffered": bench_emotion_writes(
+                    database_mongodb.EmotionDatabase, mongo_uri, args.emotion_records, buffered=True),
+                "emotion_write_unbuffered": bench_emotion_writes(
+                    database_mongodb.EmotionDatabase, mongo_uri, args.emotion_records // 10, buffered=False),
+            },
+            "fake_server_requests": server.requests,
+        }
+        report["failures"] = sum(result.get("failures", 0) for result in report["results"].values())
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if report["failures"]:
+        print(f"{report['failures']} calls returned an error or fallback answer; latencies are not meaningful.",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Check that releasing an idle course index actually gives its memory back.
+
+    python benchmarks/bench_index_release.py --documents 200 --output release.json
+    python benchmarks/bench_index_release.py --backend chroma --min-freed 0.5
+
+For each backend a `QAGenerator` indexes synthetic course notes and answers a
+retrieval so the vector index is resident, then `release()` is called, the way the
+session manager evicts idle sessions. Reported per backend:
+- rss_growth_bytes: resident memory added by opening and filling the index
+- estimated_bytes: what `memory_bytes()` claimed while the index was open
+- freed_bytes / freed_fraction: resident memory returned by `release()`
+- chroma_system_cached: whether chromadb still holds the index's system afterwards
+
+The script exits with status 1 if a backend frees less than `--min-freed` of its
+growth or Chroma keeps the released system cached.
+"""
+import argparse
+import ctypes
+import gc
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_e2e import synthetic_documents  # noqa: E402
+from benchmarks.fakes import HashEmbeddings  # noqa: E402
+
+
+def trim_heap():
+    """Return freed heap pages to the OS so RSS reflects what was released (glibc only)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def measure(backend: str, documents: list) -> dict:
+    from components.model_registry import _rss_bytes
+    from components.qa_generator import QAGenerator
+
+    gc.collect()
+    trim_heap()
+    rss_before = _rss_bytes()
+    qa = QAGenerator(user_id=f"release-{backend}", course_id="bench", backend=backend)
+    for i, text in enumerate(documents):
+        qa.process_documents("Text", text, source=f"release-doc-{i}")
+    qa.retriever.invoke("photosynthesis")
+    rss_loaded = _rss_bytes()
+    estimated = qa.memory_bytes()
+    chunks = qa._count()
+    client = qa.chroma_client
+
+    qa.release()
+    gc.collect()
+    trim_heap()
+    rss_released = _rss_bytes()
+
+    result = {
+        "chunks": chunks,
+        "rss_growth_bytes": rss_loaded - rss_before,
+        "estimated_bytes": estimated,
+        "freed_bytes": rss_loaded - rss_released,
+        "freed_fraction": (rss_loaded - rss_released) / max(rss_loaded - rss_before, 1),
+        "reported_after_release": qa.memory_bytes(),
+    }
+    if client is not None:
+        from chromadb.api.shared_system_client import SharedSystemClient
+        result["chroma_system_cached"] = client._identifier in SharedSystemClient._identifier_to_system
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("chroma", "numpy", "both"), default="both")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--document-words", type=int, default=2000)
+    parser.add_argument("--min-freed", type=float, default=0.5, help="Minimum fraction of RSS growth to free")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "SIDEKICK_INDEX_DIR": os.path.join(tmp, "indexes"),
+            "SIDEKICK_EMBED_CACHE_DIR": os.path.join(tmp, "embeddings"),
+        })
+        from components.model_registry import EMBEDDING_MODEL_NAME, registry
+        registry.register(f"embeddings:{EMBEDDING_MODEL_NAME}", HashEmbeddings())
+
+        documents = synthetic_documents(args.documents, args.document_words)
+        backends = ("numpy", "chroma") if args.backend == "both" else (args.backend,)
+        results = {backend: measure(backend, documents) for backend in backends}
+
+    failed = [
+        backend for backend, result in results.items()
+        if result["freed_fraction"] < args.min_freed or result.get("chroma_system_cached")
+    ]
+    output = json.dumps({"config": vars(args), "results": results, "failed": failed}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if failed:
+        print(f"release() did not free the index memory of: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
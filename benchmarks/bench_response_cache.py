@@ -0,0 +1,92 @@
+"""
+Check that the semantic response cache tells templated prompts apart.
+
+    python benchmarks/bench_response_cache.py
+    python benchmarks/bench_response_cache.py --embeddings minilm --output response_cache.json
+
+Study guide prompts for pairs of different tasks ("Calculus I" / "Calculus II") are
+cached and looked up, once embedding the whole prompt and once embedding only the
+task (`semantic_text`, as the app does). Cosmetic variants of the same task
+("calculus i") are looked up as well and should still hit.
+
+Reported per mode: wrong hits (another task's guide served) and variant hits. The
+script exits with status 1 if the app's mode serves any other task's guide.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import HashEmbeddings  # noqa: E402
+
+TASK_PAIRS = [
+    ("Calculus I", "Calculus II"),
+    ("Organic chemistry midterm", "Inorganic chemistry midterm"),
+    ("World War I essay", "World War II essay"),
+    ("Linear algebra homework 3", "Linear algebra homework 4"),
+    ("Spanish vocabulary chapter 5", "French vocabulary chapter 5"),
+    ("Python lists and loops", "Python dictionaries and loops"),
+]
+
+
+def study_guide_prompt(task: str) -> str:
+    # Same template as app.study_guide_prompt; duplicated so the check does not import Streamlit.
+    return f"""Create a comprehensive study guide for: {task}
+    Include:
+    1. Key topics to cover
+    2. Suggested study approach
+    3. Recommended resources
+    4. Time management tips
+    """
+
+
+def run(embeddings, use_semantic_text: bool) -> dict:
+    from components.response_cache import ResponseCache, cache_namespace
+    namespace = cache_namespace("bench")
+    wrong, variant_hits = [], 0
+    for first, second in TASK_PAIRS:
+        cache = ResponseCache(embeddings=embeddings)
+        cache.put(study_guide_prompt(first), namespace, f"guide for {first}",
+                  semantic_text=first if use_semantic_text else None)
+        served = cache.get(study_guide_prompt(second), namespace,
+                           semantic_text=second if use_semantic_text else None)
+        if served is not None:
+            wrong.append({"asked": second, "served": served})
+        variant = first.lower()
+        if cache.get(study_guide_prompt(variant), namespace,
+                     semantic_text=variant if use_semantic_text else None) is not None:
+            variant_hits += 1
+    return {"pairs": len(TASK_PAIRS), "wrong_hits": wrong, "variant_hits": variant_hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", choices=("hash", "minilm"), default="hash")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.embeddings == "minilm":
+        from components.model_registry import get_embeddings
+        embeddings = get_embeddings()
+    else:
+        embeddings = HashEmbeddings()
+    report = {
+        "config": vars(args),
+        "whole_prompt": run(embeddings, use_semantic_text=False),
+        "semantic_text": run(embeddings, use_semantic_text=True),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if report["semantic_text"]["wrong_hits"]:
+        print("The response cache served another task's study guide.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure recall@k and latency of the retrieval modes on the bundled evaluation set.
+
+    python benchmarks/bench_retrieval.py --k 4 --output retrieval.json
+
+Chunks and queries come from `benchmarks/data/retrieval_eval.json`: course material
+with course codes and formula names, and for every query the ids of the relevant
+chunks. Modes compared are vector only, BM25 only, hybrid (reciprocal rank fusion)
+and hybrid followed by the cross-encoder reranker.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document  # noqa: E402
+from components.hybrid_retriever import BM25Index, HybridRetriever  # noqa: E402
+from components.model_registry import get_embeddings, get_reranker  # noqa: E402
+from components.numpy_store import NumpyVectorStore  # noqa: E402
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "retrieval_eval.json")
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def run_mode(name, search, queries, k):
+    latencies, hits, relevant = [], 0, 0
+    for item in queries:
+        started = time.perf_counter()
+        docs = search(item["query"])[:k]
+        latencies.append(time.perf_counter() - started)
+        found = {doc.metadata["chunk_id"] for doc in docs}
+        hits += len(found & set(item["relevant"]))
+        relevant += len(item["relevant"])
+    return {
+        "mode": name,
+        "recall_at_k": hits / relevant,
+        "query_p50_ms": percentile(latencies, 0.50) * 1000,
+        "query_p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--data", default=EVAL_PATH)
+    parser.add_argument("--no-rerank", action="store_true", help="Skip the cross-encoder mode")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.data) as f:
+        data = json.load(f)
+    ids = [chunk["id"] for chunk in data["chunks"]]
+    texts = [chunk["text"] for chunk in data["chunks"]]
+    metadatas = [{"source": "eval", "chunk_id": chunk_id} for chunk_id in ids]
+    queries = data["queries"]
+
+    store = NumpyVectorStore.from_texts(texts, get_embeddings(), metadatas=metadatas, ids=ids)
+    bm25 = BM25Index()
+    for chunk_id, text, metadata in zip(ids, texts, metadatas):
+        bm25.add(chunk_id, Document(page_content=text, metadata=metadata))
+    hybrid = HybridRetriever(vector_store=store, bm25=bm25, k=args.k, candidates=args.candidates)
+
+    modes = [
+        ("vector", lambda query: store.similarity_search(query, k=args.k)),
+        ("bm25", lambda query: [doc for doc, _ in bm25.search(query, args.k)]),
+        ("hybrid", hybrid.invoke),
+    ]
+    if not args.no_rerank:
+        reranked = HybridRetriever(vector_store=store, bm25=bm25, k=args.k, candidates=args.candidates,
+                                   reranker=get_reranker())
+        modes.append(("hybrid+rerank", reranked.invoke))
+
+    report = {"chunks": len(ids), "queries": len(queries), "k": args.k, "results": []}
+    for name, search in modes:
+        search(queries[0]["query"])  # warm up models and caches
+        report["results"].append(run_mode(name, search, queries, args.k))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
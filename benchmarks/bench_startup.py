@@ -0,0 +1,88 @@
+"""
+Measure the cold start of the Streamlit app.
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+    python benchmarks/bench_startup.py --app /path/to/older/checkout/app.py
+
+Every run is a fresh Python process, so nothing is cached in memory between runs.
+Reported per run:
+- import_seconds: time to import `app.py`
+- first_render_seconds: time for Streamlit's `AppTest` to render the welcome page
+- heavy_modules: which heavy libraries were loaded by the time the page rendered
+
+The background warm-up is disabled while measuring so it does not race the checks.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("langchain", "langchain_core", "chromadb", "transformers", "torch", "sentence_transformers",
+                 "tensorflow", "deepface", "cv2", "pymongo")
+
+PROBE = """
+import json, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.abspath({app!r})))
+started = time.perf_counter()
+import importlib.util
+spec = importlib.util.spec_from_file_location("sidekick_app", {app!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+import_seconds = time.perf_counter() - started
+heavy_after_import = [name for name in {heavy!r} if name in sys.modules]
+
+render_seconds = None
+try:
+    from streamlit.testing.v1 import AppTest
+    started = time.perf_counter()
+    AppTest.from_file({app!r}, default_timeout=300).run()
+    render_seconds = time.perf_counter() - started
+except ImportError:
+    pass
+print(json.dumps({{
+    "import_seconds": import_seconds,
+    "first_render_seconds": render_seconds,
+    "heavy_modules_after_import": heavy_after_import,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_once(app: str) -> dict:
+    env = {**os.environ, "SIDEKICK_WARMUP": "0"}
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(app=app, heavy=HEAVY_MODULES)],
+        cwd=os.path.dirname(app), env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"), help="App to measure")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    app = os.path.abspath(args.app)
+    runs = [run_once(app) for _ in range(args.runs)]
+    imports = sorted(run["import_seconds"] for run in runs)
+    renders = sorted(run["first_render_seconds"] for run in runs if run["first_render_seconds"] is not None)
+    report = {
+        "app": app,
+        "runs": runs,
+        "import_median_seconds": imports[len(imports) // 2],
+        "first_render_median_seconds": renders[len(renders) // 2] if renders else None,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Compare the Chroma and NumPy vector store backends on synthetic MiniLM-sized data.
+
+    python benchmarks/bench_vector_store.py --docs 5000 --queries 200 --output vector_store.json
+
+Embeddings are random unit vectors served from a lookup table, so the numbers measure
+the stores themselves rather than the embedding model. `resident_bytes` is what
+`nbytes()` counts as held in memory (memory-mapped matrices excluded).
+
+The script exits with status 1 if an int8 store is not smaller in memory than the
+float32 store or loses more than `--min-recall` of the exact top-k.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from components.model_registry import _rss_bytes  # noqa: E402
+from components.numpy_store import NumpyVectorStore  # noqa: E402
+
+
+class TableEmbeddings(Embeddings):
+    """Returns a precomputed vector for every known text."""
+
+    def __init__(self, table: dict):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.table[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.table[text]
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def run_store(name, build, queries, k):
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    store = build()
+    build_seconds = time.perf_counter() - started
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        docs = store.similarity_search(query, k=k)
+        latencies.append(time.perf_counter() - started)
+        results.append([doc.page_content for doc in docs])
+    return store, results, {
+        "backend": name,
+        "build_seconds": build_seconds,
+        "rss_growth_bytes": max(_rss_bytes() - rss_before, 0),
+        "resident_bytes": store.nbytes() if isinstance(store, NumpyVectorStore) else None,
+        "query_p50_ms": percentile(latencies, 0.50) * 1000,
+        "query_p95_ms": percentile(latencies, 0.95) * 1000,
+        "queries_per_second": len(queries) / sum(latencies),
+    }
+
+
+def recall(results, reference):
+    hits = sum(len(set(got) & set(expected)) for got, expected in zip(results, reference))
+    return hits / sum(len(expected) for expected in reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Minimum recall@k of the int8 stores")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.docs + args.queries, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [f"doc-{i}" for i in range(args.docs)]
+    queries = [f"query-{i}" for i in range(args.queries)]
+    table = dict(zip(texts + queries, vectors.tolist()))
+    embeddings = TableEmbeddings(table)
+    ids = [str(i) for i in range(args.docs)]
+
+    report = {"docs": args.docs, "queries": args.queries, "dim": args.dim, "k": args.k, "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        float_store, reference, stats = run_store(
+            "numpy-float32", lambda: NumpyVectorStore.from_texts(texts, embeddings, ids=ids), queries, args.k)
+        stats["recall_at_k"] = 1.0
+        report["results"].append(stats)
+
+        float_store.save(os.path.join(tmp, "float"))
+        _, results, stats = run_store(
+            "numpy-float32-memmap", lambda: NumpyVectorStore.load(os.path.join(tmp, "float"), embeddings),
+            queries, args.k)
+        stats["recall_at_k"] = recall(results, reference)
+        report["results"].append(stats)
+
+        int8_store, results, stats = run_store(
+            "numpy-int8",
+            lambda: NumpyVectorStore.from_texts(texts, embeddings, ids=ids, quantize=True,
+                                                path=os.path.join(tmp, "int8")),
+            queries, args.k)
+        stats["recall_at_k"] = recall(results, reference)
+        report["results"].append(stats)
+
+        int8_store.save()
+        _, results, stats = run_store(
+            "numpy-int8-memmap", lambda: NumpyVectorStore.load(os.path.join(tmp, "int8"), embeddings, quantize=True),
+            queries, args.k)
+        stats["recall_at_k"] = recall(results, reference)
+        report["results"].append(stats)
+
+        try:
+            import chromadb
+            from langchain_community.vectorstores import Chroma
+
+            def build_chroma():
+                client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+                store = Chroma(client=client, collection_name="bench", embedding_function=embeddings,
+                               collection_metadata={"hnsw:space": "cosine"})
+                for start in range(0, args.docs, 1000):
+                    store.add_texts(texts[start:start + 1000], ids=ids[start:start + 1000])
+                return store
+
+            _, results, stats = run_store("chroma", build_chroma, queries, args.k)
+            stats["recall_at_k"] = recall(results, reference)
+            report["results"].append(stats)
+        except ImportError:
+            print("chromadb is not installed; skipping the Chroma backend.", file=sys.stderr)
+
+    float_bytes = report["results"][0]["resident_bytes"]
+    report["failed"] = [
+        stats["backend"] for stats in report["results"]
+        if stats["backend"].startswith("numpy-int8")
+        and (stats["resident_bytes"] >= float_bytes or stats["recall_at_k"] < args.min_recall)
+    ]
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if report["failed"]:
+        print(f"int8 quantization saved no memory or lost recall in: {', '.join(report['failed'])}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
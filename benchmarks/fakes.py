@@ -0,0 +1,143 @@
+"""
+Local stand-ins for the external services used by the end-to-end benchmarks.
+
+`FakeServiceServer` answers on one port as
+- Ollama: `/v1/completions` (JSON) and `/api/generate` (NDJSON stream),
+- a HuggingFace text-generation endpoint: any other POST path, TGI style
+  (`{"inputs": ...}` -> `[{"generated_text": ...}]`),
+generating a fixed number of tokens at a configurable rate so the measured latency
+reflects our own code plus a known, repeatable model cost.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+WORDS = ("the answer depends on the material covered in the course notes and the lecture "
+         "slides so review the definitions examples and formulas before the exam").split()
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings: every token is hashed into one of `dim`
+    buckets. Cheap enough that benchmarks measure the pipeline, not the model.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+            vector[bucket % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class FakeServiceServer:
+    """
+    Threaded HTTP server emulating Ollama and a HuggingFace endpoint.
+
+    :param tokens: Tokens generated per completion.
+    :param token_rate: Tokens per second; 0 answers immediately.
+    :param first_token_ms: Extra delay before the first token (prompt processing).
+    """
+
+    def __init__(self, tokens: int = 64, token_rate: float = 200.0, first_token_ms: float = 20.0):
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.first_token_ms = first_token_ms
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.token_rate if self.token_rate else 0.0
+
+    def _generate(self):
+        """Yield tokens, sleeping to honour the configured rate."""
+        time.sleep(self.first_token_ms / 1000)
+        delay = self._token_delay()
+        for i in range(self.tokens):
+            if delay:
+                time.sleep(delay)
+            yield WORDS[i % len(WORDS)] + " "
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_chunk(self, payload):
+                line = json.dumps(payload).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                if self.path.startswith("/v1/completions"):
+                    self._send_json({"choices": [{"text": "".join(fake._generate())}]})
+                elif self.path.startswith("/api/generate") and request.get("stream", True):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for token in fake._generate():
+                        self._send_chunk({"response": token, "done": False})
+                    self._send_chunk({"response": "", "done": True})
+                    self.wfile.write(b"0\r\n\r\n")
+                elif self.path.startswith("/api/generate"):
+                    self._send_json({"response": "".join(fake._generate()), "done": True})
+                else:
+                    self._send_json([{"generated_text": "".join(fake._generate())}])
+
+        return Handler
@@ -0,0 +1,120 @@
+import threading
+import time
+from logger import logger
+
+
+class CameraCapture:
+    """
+    Long-lived capture thread that owns the camera device.
+
+    The thread reads frames continuously and publishes only the most recent one into a
+    single slot (a tuple swapped by one reference assignment, so readers never take a
+    lock and never see a torn frame). Callers pull the freshest frame with `latest()`
+    at no device-open cost. If nobody reads for `idle_timeout` seconds the thread stops
+    and releases the device, so closed browser tabs don't keep the webcam busy.
+    """
+
+    def __init__(self, device=0, frame_source=None, fps: float = 15.0, warmup_frames: int = 5,
+                 idle_timeout: float = 60.0):
+        """
+        :param device: OpenCV device index or URL, used when `frame_source` is not given.
+        :param frame_source: Optional factory returning an object with `read() -> (ok, frame)`
+                             and `release()`, e.g. a synthetic source for tests and benchmarks.
+        :param fps: Maximum capture rate.
+        :param warmup_frames: Frames discarded after opening while auto-exposure settles.
+        :param idle_timeout: Seconds without readers after which the device is released.
+        """
+        self.device = device
+        self.frame_source = frame_source
+        self.interval = 1.0 / fps if fps else 0.0
+        self.warmup_frames = warmup_frames
+        self.idle_timeout = idle_timeout
+        self._latest = None
+        self._last_read = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _open(self):
+        if self.frame_source is not None:
+            return self.frame_source()
+        import cv2
+        return cv2.VideoCapture(self.device)
+
+    def start(self):
+        """Start the capture thread if it is not already running."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._last_read = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+            self._thread.start()
+            logger.info("Started camera capture thread.")
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the capture thread and release the device."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._latest = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        capture = None
+        failures = 0
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - self._last_read > self.idle_timeout:
+                    logger.info("Camera idle; releasing the device.")
+                    break
+                if capture is None:
+                    capture = self._open()
+                    for _ in range(self.warmup_frames):
+                        capture.read()
+                started = time.monotonic()
+                ok, frame = capture.read()
+                if ok:
+                    failures = 0
+                    seq += 1
+                    self._latest = (seq, time.time(), frame)
+                else:
+                    failures += 1
+                    if failures >= 10:
+                        logger.warning("Camera returned no frames; reopening the device.")
+                        capture.release()
+                        capture = None
+                        failures = 0
+                        self._stop.wait(1.0)
+                        continue
+                remaining = self.interval - (time.monotonic() - started)
+                if remaining > 0:
+                    self._stop.wait(remaining)
+        except Exception as e:
+            logger.error(f"Camera capture thread failed: {e}")
+        finally:
+            if capture is not None:
+                capture.release()
+            # A frame from before the thread stopped must not be served as current after a restart.
+            self._latest = None
+            logger.info("Camera capture thread stopped.")
+
+    def latest(self):
+        """
+        Return the freshest captured frame as `(sequence, timestamp, frame)`, or None if no
+        frame has been captured yet. Restarts the capture thread if it went idle.
+        """
+        self._last_read = time.monotonic()
+        if not self.running:
+            self.start()
+        return self._latest
+
+    def latest_frame(self):
+        """Return the freshest frame, or None."""
+        latest = self.latest()
+        return latest[2] if latest is not None else None
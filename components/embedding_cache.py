@@ -0,0 +1,233 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from logger import logger
+
+EMBED_CACHE_DIR = os.getenv("SIDEKICK_EMBED_CACHE_DIR", os.path.join("cache", "embeddings"))
+EMBED_CACHE_SIZE = int(os.getenv("SIDEKICK_EMBED_CACHE_SIZE", "50000"))
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and collapse whitespace so cosmetic differences share a cache entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed LRU cache of embedding vectors.
+
+    Vectors live in a fixed-size float32 memory-mapped file (`capacity` rows of `dim`
+    floats); an index maps keys to rows in least-recently-used order. When the cache is
+    full the least recently used row is overwritten.
+
+    Writes append `key slot` lines to a journal, so storing a batch costs O(batch).
+    The journal is folded into the JSON index snapshot once it outgrows the index, on
+    `flush` and at exit. If the embedding dimension changes (a different model) the
+    cache starts over instead of failing.
+    """
+
+    def __init__(self, path: str = EMBED_CACHE_DIR, capacity: int = EMBED_CACHE_SIZE):
+        self.path = path
+        self.capacity = capacity
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = None
+        self._entries = OrderedDict()
+        self._free_slots = []
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._index_path = os.path.join(path, "index.json")
+        self._journal_path = os.path.join(path, "journal.log")
+        self._journal = None
+        self._journal_lines = 0
+        self._load_index()
+        atexit.register(self.flush)
+
+    def _load_index(self):
+        if not (os.path.exists(self._index_path) and os.path.exists(self._vectors_path)):
+            return
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+            if index["capacity"] != self.capacity:
+                logger.info("Embedding cache capacity changed; starting with an empty cache.")
+                return
+            self._open_vectors(index["dim"], mode="r+")
+            self._entries = OrderedDict((key, slot) for key, slot in index["entries"])
+            self._replay_journal()
+            used = set(self._entries.values())
+            self._free_slots = [slot for slot in range(self.capacity - 1, -1, -1) if slot not in used]
+            logger.info(f"Loaded embedding cache with {len(self._entries)} vectors from '{self.path}'.")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load embedding cache, starting empty: {e}")
+            self._vectors = None
+            self._entries = OrderedDict()
+
+    def _replay_journal(self):
+        if not os.path.exists(self._journal_path):
+            return
+        slots = {slot: key for key, slot in self._entries.items()}
+        with open(self._journal_path) as f:
+            for line in f:
+                try:
+                    key, slot = line.split()
+                    slot = int(slot)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if not 0 <= slot < self.capacity:
+                    continue
+                previous = slots.get(slot)
+                if previous is not None and previous != key:
+                    self._entries.pop(previous, None)
+                self._entries[key] = slot
+                self._entries.move_to_end(key)
+                slots[slot] = key
+                self._journal_lines += 1
+
+    def _open_vectors(self, dim: int, mode: str):
+        self.dim = dim
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        if mode == "w+":
+            self._free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def get_many(self, keys: list) -> list:
+        """
+        Look up vectors for `keys`.
+
+        :param keys: Cache keys as built by `cache_key`.
+        :return: List aligned with `keys` holding a vector or None for misses.
+        """
+        results = []
+        with self._lock:
+            for key in keys:
+                slot = self._entries.get(key)
+                if slot is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    results.append(np.array(self._vectors[slot]))
+        return results
+
+    def put_many(self, keys: list, vectors: list):
+        """
+        Store vectors for `keys`, evicting least recently used entries when full.
+
+        :param keys: Cache keys as built by `cache_key`.
+        :param vectors: Vectors aligned with `keys`.
+        """
+        if not keys:
+            return
+        dim = len(vectors[0])
+        with self._lock:
+            if self._vectors is None or dim != self.dim:
+                if self._vectors is not None:
+                    logger.warning(f"Embedding dimension changed from {self.dim} to {dim}; "
+                                   f"starting a new embedding cache.")
+                self._reset_locked(dim)
+            journal = []
+            for key, vector in zip(keys, vectors):
+                slot = self._entries.get(key)
+                if slot is None:
+                    if self._free_slots:
+                        slot = self._free_slots.pop()
+                    else:
+                        _, slot = self._entries.popitem(last=False)
+                        self.evictions += 1
+                self._vectors[slot] = vector
+                self._entries[key] = slot
+                self._entries.move_to_end(key)
+                journal.append(f"{key} {slot}\n")
+            self._vectors.flush()
+            self._append_journal_locked(journal)
+            if self._journal_lines > max(1024, len(self._entries)):
+                self._snapshot_locked()
+
+    def _reset_locked(self, dim: int):
+        self._close_journal_locked()
+        self._entries = OrderedDict()
+        self._vectors = None
+        self._open_vectors(dim, mode="w+")
+        self._snapshot_locked()
+
+    def _append_journal_locked(self, lines: list):
+        if self._journal is None:
+            self._journal = open(self._journal_path, "a")
+        self._journal.writelines(lines)
+        self._journal.flush()
+        self._journal_lines += len(lines)
+
+    def _close_journal_locked(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def flush(self):
+        """Fold the journal into the index snapshot."""
+        with self._lock:
+            if self._vectors is not None and self._journal_lines:
+                self._vectors.flush()
+                self._snapshot_locked()
+
+    def _snapshot_locked(self):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"capacity": self.capacity, "dim": self.dim, "entries": list(self._entries.items())}, f)
+        os.replace(tmp_path, self._index_path)
+        self._close_journal_locked()
+        open(self._journal_path, "w").close()
+        self._journal_lines = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves document embeddings from an `EmbeddingCache`
+    and only sends cache misses to the underlying model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [cache_key(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        logger.debug(f"Embedded {len(texts)} chunks ({len(texts) - len(missing)} from cache).")
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> list:
+        return self.embeddings.embed_query(text)
@@ -1,5 +1,4 @@
 import streamlit as st
-from fer import FER
 from PIL import Image
 import numpy as np
 from streamlit_webrtc import (
@@ -8,20 +7,32 @@ from streamlit_webrtc import (
     VideoTransformerBase,
 )
 from database_mongodb import EmotionDatabase  
+from components.model_registry import get_fer_detector, get_fer_lock
+from components.frame_sampling import EmotionPersistPolicy, FrameSampler
+from components.mood_tracker import MoodTracker
 from logger import logger  
+from metrics import metrics
 from threading import Lock
+import time
+import os
 from datetime import datetime, timedelta
 
+# Per-frame messages are logged at most once per this many seconds per call site.
+FRAME_LOG_INTERVAL = float(os.getenv("SIDEKICK_FRAME_LOG_INTERVAL", "10"))
+
 class EmotionDetector:
-    def __init__(self):
+    def __init__(self, user_id: str = "default", mood_tracker: MoodTracker = None, emotion_db: EmotionDatabase = None):
         logger.debug("Initializing EmotionDetector component.")
-        self.db = EmotionDatabase()
+        # Reuse the session's database (and its write buffer) when given; either way the
+        # connection pool is the process-wide one.
+        self.db = emotion_db if emotion_db is not None else EmotionDatabase(user_id=user_id)
+        if mood_tracker is None:
+            mood_tracker = MoodTracker()
+            mood_tracker.rehydrate(self.db.get_recent_emotion_records(minutes=5))
+        self.mood_tracker = mood_tracker
         self.lock = Lock()
-        if 'detector' not in st.session_state:
-            st.session_state.detector = FER()
-            logger.info("Initialized and cached FER detector in session state.")
-        else:
-            logger.info("Loaded existing FER detector from session state.")
+        self.detector = get_fer_detector()
+        self.detector_lock = get_fer_lock()
         
         if 'emotion' not in st.session_state:
             st.session_state.emotion = 'Neutral'
@@ -38,15 +49,22 @@ class EmotionDetector:
                 self.db = emotion_detector.db
                 self.lock = emotion_detector.lock
                 self.emotion = 'Neutral'
+                self.sampler = FrameSampler()
+                self.persist_policy = EmotionPersistPolicy()
             
             def transform(self, frame):
                 img = frame.to_image()
-                logger.debug("Transforming video frame for emotion detection.")
-                emotion = self.emotion_detector.detect_emotion(img)
-                with self.lock:
-                    self.emotion = emotion
-                    self.db.insert_emotion(emotion)
-                annotated_img = self.emotion_detector.annotate_image(img, emotion)
+                if self.sampler.should_sample(img):
+                    logger.debug("Running emotion detection on sampled video frame.", extra={"throttle": FRAME_LOG_INTERVAL})
+                    started = time.perf_counter()
+                    emotion = self.emotion_detector.detect_emotion(img)
+                    self.sampler.record_inference(time.perf_counter() - started)
+                    self.emotion_detector.mood_tracker.record(emotion)
+                    with self.lock:
+                        self.emotion = emotion
+                        if self.persist_policy.should_persist(emotion):
+                            self.db.insert_emotion(emotion)
+                annotated_img = self.emotion_detector.annotate_image(img, self.emotion)
                 return annotated_img
                     
         webrtc_ctx = webrtc_streamer(
@@ -69,15 +87,15 @@ class EmotionDetector:
         :param image: PIL Image.
         :return: Detected emotion as a string.
         """
-        logger.debug("Resizing image for faster emotion detection.")
         image = image.resize((320, 240))  
         img_array = np.array(image.convert('RGB'))
-        emotions = st.session_state.detector.top_emotion(img_array)
+        with self.detector_lock, metrics.span("fer_top_emotion"):
+            emotions = self.detector.top_emotion(img_array)
         if emotions:
             emotion, score = emotions
-            logger.info(f"Detected emotion: {emotion} with score {score:.2f}.")
+            logger.info("Detected emotion: %s with score %.2f.", emotion, score, extra={"throttle": FRAME_LOG_INTERVAL})
             return emotion.capitalize()
-        logger.info("No emotion detected; defaulting to Neutral.")
+        logger.info("No emotion detected; defaulting to Neutral.", extra={"throttle": FRAME_LOG_INTERVAL})
         return 'Neutral'
     
     def annotate_image(self, image: Image.Image, emotion: str) -> Image.Image:
@@ -106,25 +124,18 @@ class EmotionDetector:
         
         :param current_emotion: The latest detected emotion.
         """
-        time_window_minutes = 5
-        recent_emotions = self.db.get_recent_emotions(minutes=time_window_minutes)
-        emotion_counts = {}
-        for emotion in recent_emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        logger.debug(f"Emotion counts in the last {time_window_minutes} minutes: {emotion_counts}")
+        time_window_minutes = self.mood_tracker.window_seconds / 60
+        most_frequent_emotion, share = self.mood_tracker.dominant()
         
-        if not recent_emotions:
+        if most_frequent_emotion is None:
             st.info("No recent emotions detected.")
             logger.info("No recent emotions to analyze.")
             return
         
-        most_frequent_emotion = max(emotion_counts, key=emotion_counts.get)
-        frequency = emotion_counts[most_frequent_emotion]
-        total = len(recent_emotions)
-        percentage = (frequency / total) * 100
+        percentage = share * 100
         
-        logger.debug(f"Most frequent emotion: {most_frequent_emotion} ({percentage:.2f}%)")
+        logger.debug(f"Most frequent emotion in the last {time_window_minutes:.0f} minutes: "
+                     f"{most_frequent_emotion} ({percentage:.2f}%)")
         
         persistence_threshold = 70  
         
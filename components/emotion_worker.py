@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from components.latency import LatencyStats
+from logger import logger
+from metrics import metrics
+
+EMOTION_WORKERS = int(os.getenv("SIDEKICK_EMOTION_WORKERS", "1"))
+EMOTION_QUEUE_SIZE = int(os.getenv("SIDEKICK_EMOTION_QUEUE_SIZE", "8"))
+
+# DeepFace builds its Keras models lazily into a global cache and, like FER, is not safe
+# to call from several threads at once.
+_deepface_lock = threading.Lock()
+
+
+def analyze_with_deepface(frame_rgb) -> str:
+    """Return the dominant emotion DeepFace finds in an RGB frame."""
+    from deepface import DeepFace
+    with _deepface_lock, metrics.span("deepface_analyze"):
+        result = DeepFace.analyze(frame_rgb, actions=['emotion'], enforce_detection=False)
+    return result[0]['dominant_emotion']
+
+
+class EmotionInferenceService:
+    """
+    Worker pool running emotion inference off the Streamlit script thread.
+
+    Frames are queued in a bounded queue; when it is full the oldest pending frame is
+    dropped (its future is cancelled) because a newer frame makes it stale. Callers get
+    a `concurrent.futures.Future` per frame and keep showing their last completed
+    result until it resolves. Threads are used rather than processes so the DeepFace
+    models are loaded only once; DeepFace calls are serialised, so one worker is the
+    default.
+    """
+
+    def __init__(self, analyze=analyze_with_deepface, workers: int = EMOTION_WORKERS,
+                 queue_size: int = EMOTION_QUEUE_SIZE):
+        """
+        :param analyze: Callable mapping an RGB frame to an emotion label.
+        :param workers: Number of inference threads.
+        :param queue_size: Maximum number of frames waiting for a worker.
+        """
+        self.analyze = analyze
+        self.queue_size = queue_size
+        self.stats = LatencyStats()
+        self.dropped = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._run, name=f"emotion-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, frame_rgb) -> Future:
+        """
+        Queue a frame for analysis.
+
+        :param frame_rgb: RGB frame as a NumPy array.
+        :return: Future resolving to the detected emotion.
+        """
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Emotion inference service is shut down.")
+            while len(self._queue) >= self.queue_size:
+                _, dropped_future = self._queue.popleft()
+                dropped_future.cancel()
+                self.dropped += 1
+            self._queue.append((frame_rgb, future))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown and not self._queue:
+                    return
+                frame_rgb, future = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.perf_counter()
+            try:
+                emotion = self.analyze(frame_rgb)
+            except Exception as e:
+                self.stats.record(time.perf_counter() - started, ok=False)
+                logger.error(f"Emotion inference failed: {e}")
+                future.set_exception(e)
+            else:
+                self.stats.record(time.perf_counter() - started)
+                future.set_result(emotion)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting frames, cancel pending ones and stop the workers."""
+        with self._cond:
+            self._shutdown = True
+            while self._queue:
+                self._queue.popleft()[1].cancel()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_emotion_service = None
+_emotion_service_lock = threading.Lock()
+
+
+def get_emotion_service() -> EmotionInferenceService:
+    """Return the process-wide emotion inference service."""
+    global _emotion_service
+    with _emotion_service_lock:
+        if _emotion_service is None:
+            _emotion_service = EmotionInferenceService()
+        return _emotion_service
+
+
+def current_emotion_service():
+    """Return the emotion inference service if it has been started, else None."""
+    return _emotion_service
@@ -0,0 +1,105 @@
+import os
+import time
+import numpy as np
+
+SAMPLING_POLICY = os.getenv("SIDEKICK_SAMPLING_POLICY", "adaptive")
+SAMPLING_HZ = float(os.getenv("SIDEKICK_SAMPLING_HZ", "2"))
+EMOTION_HEARTBEAT_SECONDS = float(os.getenv("SIDEKICK_EMOTION_HEARTBEAT", "30"))
+
+
+class FrameSampler:
+    """
+    Decides which video frames get emotion inference.
+
+    Policies:
+        - "fixed": sample at most `hz` frames per second.
+        - "change": sample when a tiny grayscale thumbnail differs from the last sampled
+          one by more than `change_threshold` (mean absolute pixel difference), or after
+          `max_interval` seconds.
+        - "adaptive": size the interval from the measured inference time so inference
+          uses at most `target_load` of wall-clock time, clamped to
+          [`min_interval`, `max_interval`].
+    """
+
+    POLICIES = ("fixed", "change", "adaptive")
+
+    def __init__(self, policy: str = SAMPLING_POLICY, hz: float = SAMPLING_HZ, change_threshold: float = 12.0,
+                 min_interval: float = 0.1, max_interval: float = 2.0, target_load: float = 0.25):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown sampling policy '{policy}', expected one of {self.POLICIES}")
+        self.policy = policy
+        self.interval = 1.0 / hz
+        self.change_threshold = change_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_load = target_load
+        self.frames = 0
+        self.sampled = 0
+        self._last_sample = None
+        self._last_thumbnail = None
+        self._inference_ema = None
+
+    @staticmethod
+    def _thumbnail(image) -> np.ndarray:
+        return np.asarray(image.convert("L").resize((16, 12)), dtype=np.float32)
+
+    def should_sample(self, image, now: float = None) -> bool:
+        """
+        Return True if inference should run on this frame.
+
+        :param image: PIL image of the frame (only used by the "change" policy).
+        :param now: Monotonic timestamp, defaults to `time.monotonic()`.
+        """
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        elapsed = None if self._last_sample is None else now - self._last_sample
+
+        if elapsed is None:
+            sample = True
+        elif self.policy == "fixed":
+            sample = elapsed >= self.interval
+        elif self.policy == "change":
+            sample = elapsed >= self.max_interval
+            if not sample and elapsed >= self.min_interval:
+                thumbnail = self._thumbnail(image)
+                sample = float(np.mean(np.abs(thumbnail - self._last_thumbnail))) > self.change_threshold
+        else:
+            interval = self.interval
+            if self._inference_ema is not None:
+                interval = self._inference_ema / self.target_load
+            sample = elapsed >= min(max(interval, self.min_interval), self.max_interval)
+
+        if sample:
+            self._last_sample = now
+            self.sampled += 1
+            if self.policy == "change":
+                self._last_thumbnail = self._thumbnail(image)
+        return sample
+
+    def record_inference(self, seconds: float):
+        """Feed back how long the last inference took (used by the "adaptive" policy)."""
+        if self._inference_ema is None:
+            self._inference_ema = seconds
+        else:
+            self._inference_ema = 0.8 * self._inference_ema + 0.2 * seconds
+
+
+class EmotionPersistPolicy:
+    """
+    Persist an emotion only when it changes, or as a heartbeat every `heartbeat_seconds`
+    while it stays the same.
+    """
+
+    def __init__(self, heartbeat_seconds: float = EMOTION_HEARTBEAT_SECONDS):
+        self.heartbeat_seconds = heartbeat_seconds
+        self._last_emotion = None
+        self._last_persisted = None
+
+    def should_persist(self, emotion: str, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if (emotion != self._last_emotion or self._last_persisted is None
+                or now - self._last_persisted >= self.heartbeat_seconds):
+            self._last_emotion = emotion
+            self._last_persisted = now
+            return True
+        return False
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from components.latency import LatencyStats
+from logger import logger
+
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class HTTPTransport:
+    """
+    Shared HTTP transport with keep-alive connection pooling, timeouts and retries.
+
+    The sync path uses a `requests.Session` that keeps up to `pool_size` connections
+    per host alive; callers beyond that open a short-lived extra connection rather than
+    waiting (requests never passes a pool timeout, so a blocking pool could stall the
+    script thread forever); the async path lazily opens one `aiohttp.ClientSession`
+    per event loop with the same limits. Latency of every request (time to response
+    headers) is recorded in `stats`.
+    """
+
+    def __init__(self, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES, backoff_factor: float = RETRY_BACKOFF):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.stats = LatencyStats()
+
+        # Only retry failures where the request never reached Ollama (connect errors) or
+        # was refused outright (RETRY_STATUSES). A read timeout means a generation may
+        # still be running, so re-POSTing would duplicate it.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            other=0,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._async_sessions = {}
+        self._async_lock = threading.Lock()
+
+    def post(self, url: str, json: dict, stream: bool = False) -> requests.Response:
+        """
+        POST `json` to `url` over the pooled session.
+
+        :param url: Target URL.
+        :param json: JSON body.
+        :param stream: Return as soon as headers arrive and stream the body.
+        :return: The response; HTTP errors are raised as `requests.HTTPError`.
+        """
+        started = time.perf_counter()
+        try:
+            response = self.session.post(url, json=json, stream=stream,
+                                         timeout=(self.connect_timeout, self.read_timeout))
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            self.stats.record(time.perf_counter() - started, ok=False)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return response
+
+    def _async_session(self):
+        import aiohttp
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            for other_loop in [l for l in self._async_sessions if l.is_closed()]:
+                del self._async_sessions[other_loop]
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit_per_host=self.pool_size, keepalive_timeout=30),
+                    timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+                )
+                self._async_sessions[loop] = session
+            return session
+
+    async def apost(self, url: str, json: dict) -> dict:
+        """
+        POST `json` to `url` from asyncio code, retrying connect errors and
+        `RETRY_STATUSES` with exponential backoff.
+
+        :param url: Target URL.
+        :param json: JSON body.
+        :return: Decoded JSON response.
+        """
+        import aiohttp
+        session = self._async_session()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=json) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                    response.raise_for_status()
+                    result = await response.json()
+                self.stats.record(time.perf_counter() - started)
+                return result
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.stats.record(time.perf_counter() - started, ok=False)
+                if isinstance(e, aiohttp.ClientResponseError):
+                    retryable = e.status in RETRY_STATUSES
+                else:
+                    retryable = isinstance(e, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError))
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_factor * (2 ** attempt)
+                logger.warning(f"Retrying POST {url} in {delay:.2f}s after error: {e}")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close the aiohttp session bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            session = self._async_sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Return the process-wide pooled HTTP transport."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+        return _transport
+
+
+def current_transport():
+    """Return the HTTP transport if it has been created, else None."""
+    return _transport
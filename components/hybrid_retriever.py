@@ -0,0 +1,156 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Optional
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from logger import logger
+
+# Keeps identifiers like "CS-101", "MATH221", "3.14" or "log_softmax" together as one token.
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercase word tokens; compound identifiers are also split into their parts so
+    "CS-101" matches both "cs-101" and "cs 101".
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[._\-]", token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+            tokens.append("".join(parts))
+    return tokens
+
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index over chunks.
+
+    Postings are kept per term, so adding or removing a chunk only touches the terms
+    of that chunk and the index never has to be rebuilt.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._lengths = {}
+        self._documents = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def nbytes(self) -> int:
+        """Rough in-memory size: chunk texts plus an estimated cost per posting."""
+        with self._lock:
+            postings = sum(len(docs) for docs in self._postings.values())
+            text = sum(len(document.page_content) for document in self._documents.values())
+        return text + 100 * postings
+
+    def add(self, doc_id: str, document):
+        """
+        Index a chunk, replacing any earlier chunk with the same id.
+
+        :param doc_id: Chunk id.
+        :param document: LangChain `Document` returned by searches.
+        """
+        term_counts = Counter(tokenize(document.page_content))
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, count in term_counts.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            length = sum(term_counts.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+            self._documents[doc_id] = document
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for term in set(tokenize(document.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def search(self, query: str, k: int) -> list:
+        """
+        Return up to `k` `(document, score)` pairs ranked by BM25.
+        """
+        with self._lock:
+            n = len(self._lengths)
+            if not n:
+                return []
+            average_length = self._total_length / n
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self._documents[doc_id], score) for doc_id, score in best]
+
+
+def reciprocal_rank_fusion(rankings: list, rrf_k: int = 60) -> list:
+    """
+    Fuse ranked lists of documents by reciprocal rank, keyed by their `chunk_id` metadata.
+
+    :param rankings: Lists of documents, best first.
+    :param rrf_k: Damping constant; larger values flatten the contribution of top ranks.
+    :return: Documents ordered by fused score.
+    """
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking):
+            key = document.metadata.get("chunk_id") or document.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing vector similarity and BM25 keyword ranking with reciprocal rank
+    fusion. Optionally a cross-encoder reranks the top `candidates` fused chunks before
+    the best `k` are returned.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: Any
+    bm25: BM25Index
+    k: int = 4
+    candidates: int = 20
+    rrf_k: int = 60
+    reranker: Optional[Any] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        vector_hits = self.vector_store.similarity_search(query, k=self.candidates)
+        keyword_hits = [document for document, _ in self.bm25.search(query, self.candidates)]
+        fused = reciprocal_rank_fusion([vector_hits, keyword_hits], self.rrf_k)
+        if self.reranker is None or len(fused) <= self.k:
+            return fused[:self.k]
+        candidates = fused[:self.candidates]
+        scores = self.reranker.predict([(query, document.page_content) for document in candidates])
+        ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+        logger.debug(f"Reranked {len(candidates)} hybrid candidates.")
+        return [document for document, _ in ranked[:self.k]]
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logger import logger
+from metrics import metrics
+
+PDF_WORKERS = int(os.getenv("SIDEKICK_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_TASK = int(os.getenv("SIDEKICK_PDF_PAGES_PER_TASK", "8"))
+EMBED_BATCH_SIZE = int(os.getenv("SIDEKICK_EMBED_BATCH_SIZE", "64"))
+
+
+def extract_pages(path: str, start: int, stop: int) -> list:
+    """
+    Extract the text of pages [start, stop) of a PDF. Runs in a worker process.
+
+    :return: List of (page_number, text) tuples.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [(number, reader.pages[number].extract_text() or "") for number in range(start, stop)]
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide PDF parsing pool. Workers are spawned rather than forked
+    because the Streamlit server process already runs many threads.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+
+class PdfIngestionJob:
+    """
+    Streaming ingestion of one PDF into a `QAGenerator` index.
+
+    Page ranges are parsed in the shared process pool; as each range completes its
+    pages are split, and chunks are embedded and written to the vector store in
+    batches of `batch_size`, so retrieval over the indexed pages works before the
+    whole document is done. Chunks of an earlier version of the same source that no
+    longer appear are removed at the end.
+
+    The job is bound to the course index that was open when it was created: every
+    write holds the generator's `index_lock` and the job stops with an error rather
+    than write into another course's index if the course was switched. If the
+    generator was closed meanwhile (its session ended), the job releases it when done.
+    """
+
+    def __init__(self, qa_generator, path: str, source: str, delete_path: bool = False,
+                 batch_size: int = EMBED_BATCH_SIZE, pages_per_task: int = PAGES_PER_TASK):
+        self.qa_generator = qa_generator
+        self.course_id = qa_generator.course_id
+        self.store = qa_generator.db
+        self.path = path
+        self.source = source
+        self.delete_path = delete_path
+        self.batch_size = batch_size
+        self.pages_per_task = pages_per_task
+        self.total_pages = 0
+        self.pages_done = 0
+        self.chunks_indexed = 0
+        self.chunks_added = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    @property
+    def progress(self) -> float:
+        if not self.total_pages:
+            return 0.0
+        return self.pages_done / self.total_pages
+
+    def start(self):
+        """Run the ingestion on a background thread."""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self.run, name="pdf-ingestion", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """Run the ingestion on the calling thread."""
+        from pypdf import PdfReader
+        from langchain.docstore.document import Document
+
+        self.started_at = self.started_at or time.time()
+        qa_generator = self.qa_generator
+        seen_ids = set()
+        pending_ids, pending_docs = [], []
+        try:
+            self.total_pages = len(PdfReader(self.path).pages)
+            metrics.inc("pdf_pages_total", self.total_pages)
+            pool = get_pdf_pool()
+            futures = [
+                pool.submit(extract_pages, self.path, start, min(start + self.pages_per_task, self.total_pages))
+                for start in range(0, self.total_pages, self.pages_per_task)
+            ]
+            for future in as_completed(futures):
+                pages = future.result()
+                documents = [
+                    Document(page_content=text, metadata={"source": self.source, "page": number})
+                    for number, text in pages if text.strip()
+                ]
+                with metrics.span("ingest_stage", stage="split"):
+                    chunks = qa_generator.text_splitter.split_documents(documents)
+                ids, docs = qa_generator._key_chunks(self.source, chunks, seen_ids)
+                pending_ids.extend(ids)
+                pending_docs.extend(docs)
+                while len(pending_ids) >= self.batch_size:
+                    self._index_batch(pending_ids[:self.batch_size], pending_docs[:self.batch_size])
+                    del pending_ids[:self.batch_size], pending_docs[:self.batch_size]
+                self.pages_done += len(pages)
+            self._index_batch(pending_ids, pending_docs)
+            with qa_generator.index_lock:
+                self._check_course()
+                removed = qa_generator._remove_stale_chunks(self.source, seen_ids)
+                qa_generator._refresh_retriever()
+            logger.info(f"Ingested '{self.source}': {self.total_pages} pages, {self.chunks_indexed} chunks "
+                        f"({self.chunks_added} embedded, {removed} stale removed) in "
+                        f"{time.time() - self.started_at:.1f}s.")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Error ingesting PDF '{self.source}': {e}")
+        finally:
+            with qa_generator.index_lock:
+                self.finished_at = time.time()
+                if qa_generator.closed:
+                    qa_generator.release()
+            if self.delete_path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _check_course(self):
+        if self.qa_generator.db is not self.store:
+            raise RuntimeError(f"the course index changed from '{self.course_id}' while indexing")
+
+    def _index_batch(self, ids: list, docs: list):
+        if not ids:
+            return
+        with self.qa_generator.index_lock:
+            self._check_course()
+            self.chunks_added += self.qa_generator._add_chunks(ids, docs)
+            self.chunks_indexed += len(ids)
+            self.qa_generator._refresh_retriever()
@@ -0,0 +1,40 @@
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Thread-safe latency recorder keeping a sliding window of recent samples.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, seconds: float, ok: bool = True):
+        with self._lock:
+            self._samples.append(seconds)
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            requests_count, errors = self.requests, self.errors
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "requests": requests_count,
+            "errors": errors,
+            "mean_seconds": sum(samples) / len(samples) if samples else 0.0,
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "p99_seconds": percentile(0.99),
+        }
@@ -1,9 +1,24 @@
+import asyncio
+import json
 import requests
+import time
 import streamlit as st
 from langchain.llms.base import LLM
+from langchain_core.outputs import GenerationChunk
 from pydantic import Field
-from typing import Optional
+from typing import Iterator, Optional
+from components.http_transport import get_transport
+from components.response_cache import cache_namespace, get_response_cache
 from logger import logger
+from metrics import metrics
+
+FALLBACK_RESPONSE = "I'm sorry, I couldn't process that."
+
+def _report_error(message: str):
+    """Show `message` on the page; calls from worker threads have no page and only log."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        st.error(message)
 
 class OllamaLLM(LLM):
     """
@@ -11,6 +26,10 @@ class OllamaLLM(LLM):
     """
     model_name: str = Field(default="llama3.1:latest", description="Name of the Ollama model to use")
     host: str = Field(default="http://localhost:11434", description="Host URL where Ollama's API is running")
+    max_tokens: int = Field(default=256, description="Maximum number of tokens to generate")
+    temperature: float = Field(default=0.5, description="Sampling temperature")
+    top_p: float = Field(default=0.9, description="Nucleus sampling probability mass")
+    cache_responses: bool = Field(default=True, description="Serve repeated or near-identical prompts from the response cache")
 
     @property
     def _llm_type(self):
@@ -28,36 +47,161 @@ class OllamaLLM(LLM):
         self.host = host.rstrip('/')
         logger.debug(f"Initialized OllamaLLM with model '{self.model_name}' at host '{self.host}'.")
     
-    def _call(self, prompt: str, stop: Optional[list] = None) -> str:
+    def _completion_request(self, prompt: str, stop: Optional[list]) -> dict:
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "stop": stop
+        }
+
+    def _cache_namespace(self, stop: Optional[list]) -> str:
+        return cache_namespace(self.model_name, max_tokens=self.max_tokens, temperature=self.temperature,
+                               top_p=self.top_p, stop=stop)
+
+    def _cached(self, prompt: str, stop: Optional[list], semantic_text: Optional[str] = None):
+        if not self.cache_responses:
+            return None
+        cached = get_response_cache().get(prompt, self._cache_namespace(stop), semantic_text)
+        metrics.inc("ollama_cache_lookups_total", result="hit" if cached is not None else "miss")
+        return cached
+
+    def _store(self, prompt: str, stop: Optional[list], completion: str, semantic_text: Optional[str] = None):
+        if self.cache_responses and completion:
+            get_response_cache().put(prompt, self._cache_namespace(stop), completion, semantic_text)
+
+    def _call(self, prompt: str, stop: Optional[list] = None, run_manager=None, semantic_text: Optional[str] = None,
+              **kwargs) -> str:
         """
         Send the prompt to Ollama's API and retrieve the response.
         
         :param prompt: The prompt string to send to the model.
         :param stop: Optional list of stop sequences.
+        :param semantic_text: Variable part of a templated prompt, used by the semantic response cache.
+        :return: The response string from the model.
+        """
+        url = f"{self.host}/v1/completions"
+        data = self._completion_request(prompt, stop)
+
+        cached = self._cached(prompt, stop, semantic_text)
+        if cached is not None:
+            logger.debug("Serving Ollama response from cache.")
+            return cached
+
+        logger.debug("Sending prompt to Ollama: %s", prompt)
+        try:
+            with metrics.span("ollama_request", mode="completion"):
+                response = get_transport().post(url, json=data)
+                result = response.json()
+            completion = result["choices"][0]["text"].strip()
+            logger.info("Received response from Ollama: %s", completion)
+            self._store(prompt, stop, completion, semantic_text)
+            return completion
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error communicating with Ollama API: {e}")
+            _report_error("Error communicating with Ollama API.")
+            return FALLBACK_RESPONSE
+
+    async def _acall(self, prompt: str, stop: Optional[list] = None, run_manager=None,
+                     semantic_text: Optional[str] = None, **kwargs) -> str:
+        """
+        Asynchronously send the prompt to Ollama's API over the pooled aiohttp session.
+        
+        :param prompt: The prompt string to send to the model.
+        :param stop: Optional list of stop sequences.
+        :param semantic_text: Variable part of a templated prompt, used by the semantic response cache.
         :return: The response string from the model.
         """
+        import aiohttp
         url = f"{self.host}/v1/completions"
-        headers = {
-            "Content-Type": "application/json"
+        data = self._completion_request(prompt, stop)
+
+        cached = self._cached(prompt, stop, semantic_text)
+        if cached is not None:
+            logger.debug("Serving Ollama response from cache.")
+            return cached
+
+        logger.debug("Sending prompt to Ollama (async): %s", prompt)
+        try:
+            with metrics.span("ollama_request", mode="async"):
+                result = await get_transport().apost(url, json=data)
+            completion = result["choices"][0]["text"].strip()
+            logger.info("Received response from Ollama: %s", completion)
+            self._store(prompt, stop, completion, semantic_text)
+            return completion
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error communicating with Ollama API: {e}")
+            return FALLBACK_RESPONSE
+
+    def _stream(self, prompt: str, stop: Optional[list] = None, run_manager=None, semantic_text: Optional[str] = None,
+                **kwargs) -> Iterator[GenerationChunk]:
+        """
+        Stream the completion token by token from Ollama's native `/api/generate` endpoint.
+        
+        :param prompt: The prompt string to send to the model.
+        :param stop: Optional list of stop sequences.
+        :param semantic_text: Variable part of a templated prompt, used by the semantic response cache.
+        :param run_manager: LangChain callback manager notified of every new token.
+        :return: Iterator of generation chunks. Only a stream that completed cleanly ends with a
+                 chunk whose `generation_info` has `done` set.
+        """
+        url = f"{self.host}/api/generate"
+        options = {
+            "num_predict": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
         }
+        if stop:
+            options["stop"] = stop
         data = {
             "model": self.model_name,
             "prompt": prompt,
-            "max_tokens": 256, 
-            "temperature": 0.5,  
-            "top_p": 0.9,
-            "stop": stop
+            "stream": True,
+            "options": options
         }
 
-        logger.debug(f"Sending prompt to Ollama: {prompt}")
+        cached = self._cached(prompt, stop, semantic_text)
+        if cached is not None:
+            logger.debug("Serving Ollama response from cache.")
+            chunk = GenerationChunk(text=cached, generation_info={"done": True})
+            if run_manager:
+                run_manager.on_llm_new_token(cached, chunk=chunk)
+            yield chunk
+            return
+
+        logger.debug("Streaming prompt to Ollama: %s", prompt)
+        tokens = []
+        started = time.perf_counter()
         try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            completion = result["choices"][0]["text"].strip()
-            logger.info(f"Received response from Ollama: {completion}")
-            return completion
+            with get_transport().post(url, json=data, stream=True) as response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    payload = json.loads(line)
+                    if payload.get("error"):
+                        raise requests.exceptions.RequestException(payload["error"])
+                    token = payload.get("response", "")
+                    if token:
+                        if not tokens:
+                            metrics.observe("ollama_first_token_seconds", time.perf_counter() - started)
+                        tokens.append(token)
+                        chunk = GenerationChunk(text=token)
+                        if run_manager:
+                            run_manager.on_llm_new_token(token, chunk=chunk)
+                        yield chunk
+                    if payload.get("done"):
+                        break
+            metrics.observe("ollama_request_seconds", time.perf_counter() - started, mode="stream")
+            logger.info("Finished streaming response from Ollama.")
+            self._store(prompt, stop, "".join(tokens).strip(), semantic_text)
+            yield GenerationChunk(text="", generation_info={"done": True})
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error communicating with Ollama API: {e}")
-            st.error("Error communicating with Ollama API.")
-            return "I'm sorry, I couldn't process that."
+            metrics.inc("ollama_request_errors_total", mode="stream")
+            logger.error(f"Error streaming from Ollama API: {e}")
+            _report_error("Error communicating with Ollama API.")
+            # After a partial answer the fallback would be glued onto it; leave the
+            # partial text as is. Either way nothing is cached.
+            if not tokens:
+                yield GenerationChunk(text=FALLBACK_RESPONSE)
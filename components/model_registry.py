@@ -0,0 +1,214 @@
+import os
+import time
+import threading
+from logger import logger
+
+
+def _rss_bytes() -> int:
+    """
+    Return the current resident set size of this process in bytes.
+
+    :return: RSS in bytes, or 0 when it cannot be determined.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is a high-water mark (KiB on Linux), good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe registry of heavy models.
+
+    Every Streamlit session runs in its own thread of the same process, so models
+    registered here are loaded once and the same handle is shared by all sessions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._models = {}
+        self._stats = {}
+
+    def get(self, name: str, loader):
+        """
+        Return the model registered under `name`, loading it with `loader` on first use.
+
+        Concurrent callers asking for the same model block on a per-model lock, so the
+        loader runs exactly once; callers asking for different models don't wait on each other.
+
+        :param name: Unique name of the model.
+        :param loader: Zero-argument callable that builds the model.
+        :return: The shared model instance.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            logger.info(f"Loading model '{name}' into the shared registry.")
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+            memory_bytes = max(_rss_bytes() - rss_before, 0)
+
+            with self._lock:
+                self._models[name] = model
+                self._stats[name] = {
+                    "load_seconds": load_seconds,
+                    "memory_bytes": memory_bytes,
+                    "loaded_at": time.time(),
+                }
+            logger.info(
+                f"Loaded model '{name}' in {load_seconds:.2f}s "
+                f"(~{memory_bytes / (1024 * 1024):.1f} MiB)."
+            )
+            return model
+
+    def register(self, name: str, model):
+        """
+        Register an already-built model under `name`, replacing any previous one.
+
+        :param name: Unique name of the model.
+        :param model: The model instance.
+        """
+        with self._lock:
+            self._models[name] = model
+            self._stats[name] = {"load_seconds": 0.0, "memory_bytes": 0, "loaded_at": time.time()}
+        logger.debug(f"Registered model '{name}' in the shared registry.")
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def unload(self, name: str):
+        """
+        Drop the model registered under `name` so that the next `get` reloads it.
+
+        :param name: Unique name of the model.
+        """
+        with self._lock:
+            self._models.pop(name, None)
+            self._stats.pop(name, None)
+        logger.info(f"Unloaded model '{name}' from the shared registry.")
+
+    def stats(self) -> dict:
+        """
+        Return load time and approximate memory footprint for every loaded model.
+
+        Memory is measured as the growth of the process RSS while the loader ran, so it
+        is approximate when several models load concurrently.
+
+        :return: Mapping of model name to a dict of statistics.
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+registry = ModelRegistry()
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+QA_LLM_REPO_ID = "mistralai/Mistral-7B-Instruct-v0.3"
+RERANKER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Dedicated inference endpoint (or a local stand-in) to use instead of the hosted QA model.
+QA_ENDPOINT_URL = os.getenv("SIDEKICK_QA_ENDPOINT_URL")
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Return the shared on-disk embedding cache. It is not a model, so it is kept outside the registry."""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            from components.embedding_cache import EmbeddingCache
+            _embedding_cache = EmbeddingCache()
+        return _embedding_cache
+
+
+def current_embedding_cache():
+    """Return the embedding cache if it has been opened, else None."""
+    return _embedding_cache
+
+
+def get_embeddings():
+    """Return the shared MiniLM sentence embedder, fronted by the embedding cache."""
+    def load():
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from components.embedding_cache import CachedEmbeddings
+        embeddings = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+        return CachedEmbeddings(embeddings, EMBEDDING_MODEL_NAME, get_embedding_cache())
+    return registry.get(f"embeddings:{EMBEDDING_MODEL_NAME}", load)
+
+
+def get_reranker():
+    """Return the shared cross-encoder used to rerank retrieved chunks."""
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(RERANKER_MODEL_NAME, device='cpu')
+    return registry.get(f"reranker:{RERANKER_MODEL_NAME}", load)
+
+
+def get_qa_llm(hf_token: str):
+    """Return the shared HuggingFace endpoint used for course Q&A."""
+    def load():
+        from langchain_huggingface import HuggingFaceEndpoint
+        if QA_ENDPOINT_URL:
+            return HuggingFaceEndpoint(endpoint_url=QA_ENDPOINT_URL, max_length=128, temperature=0.7, token=hf_token)
+        return HuggingFaceEndpoint(
+            repo_id=QA_LLM_REPO_ID,
+            max_length=128,
+            temperature=0.7,
+            token=hf_token
+        )
+    return registry.get(f"qa_llm:{QA_ENDPOINT_URL or QA_LLM_REPO_ID}", load)
+
+
+def get_ollama_llm(model_name: str = "llama3.1:latest", host: str = "http://localhost:11434"):
+    """Return the shared OllamaLLM client for the given model and host."""
+    def load():
+        from components.llm import OllamaLLM
+        return OllamaLLM(model_name=model_name, host=host)
+    return registry.get(f"ollama:{host}:{model_name}", load)
+
+
+_fer_lock = threading.Lock()
+
+
+def get_fer_detector():
+    """Return the shared FER emotion detector."""
+    def load():
+        from fer import FER
+        return FER()
+    return registry.get("fer", load)
+
+
+def get_fer_lock() -> threading.Lock:
+    """
+    Return the lock guarding the shared FER detector.
+
+    The underlying Keras model is not safe to call from several threads at once,
+    so all sessions serialise their `top_emotion` calls through this lock.
+    """
+    return _fer_lock
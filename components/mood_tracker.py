@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import Counter, deque
+from datetime import timezone
+from logger import logger
+
+
+class MoodTracker:
+    """
+    Rolling-window emotion counter for one session.
+
+    Detections are counted in fixed-width time buckets; a running total over the
+    buckets still inside the window is kept up to date as buckets expire, so recording
+    an emotion and asking for the dominant one are both O(1) (amortised, and there are
+    only a handful of emotion labels). MongoDB stays the durable history and is only
+    read once to rehydrate the window when a session starts.
+    """
+
+    def __init__(self, window_seconds: float = 300, bucket_seconds: float = 10):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._buckets = deque()
+        self._totals = Counter()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        oldest_allowed = now - self.window_seconds
+        while self._buckets and self._buckets[0][0] + self.bucket_seconds <= oldest_allowed:
+            _, counts = self._buckets.popleft()
+            self._totals.subtract(counts)
+            for emotion in [e for e, c in self._totals.items() if c <= 0]:
+                del self._totals[emotion]
+
+    def record(self, emotion: str, timestamp: float = None):
+        """
+        Count one detection of `emotion`.
+
+        :param emotion: Detected emotion label.
+        :param timestamp: Unix time of the detection, defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket_start = timestamp - (timestamp % self.bucket_seconds)
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == bucket_start:
+                self._buckets[-1][1][emotion] += 1
+            elif not self._buckets or bucket_start > self._buckets[-1][0]:
+                self._buckets.append((bucket_start, Counter({emotion: 1})))
+            else:
+                # Late detection for an older bucket (only happens while rehydrating out of order).
+                for start, counts in self._buckets:
+                    if start == bucket_start:
+                        counts[emotion] += 1
+                        break
+                else:
+                    return
+            self._totals[emotion] += 1
+            self._expire(time.time())
+
+    def counts(self, now: float = None) -> dict:
+        """Return detections per emotion inside the window."""
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            return dict(self._totals)
+
+    def dominant(self, now: float = None) -> tuple:
+        """
+        Return the most frequent emotion in the window and its share of all detections.
+
+        :return: `(emotion, share)` with share in [0, 1], or `(None, 0.0)` if the window is empty.
+        """
+        counts = self.counts(now)
+        total = sum(counts.values())
+        if not total:
+            return None, 0.0
+        emotion = max(counts, key=counts.get)
+        return emotion, counts[emotion] / total
+
+    def rehydrate(self, records):
+        """
+        Load detections from durable history, e.g. on session start.
+
+        :param records: Iterable of `(timestamp, emotion)` pairs; timestamps may be Unix
+                        times or naive UTC datetimes as stored in MongoDB.
+        """
+        loaded = 0
+        for timestamp, emotion in sorted(records, key=lambda record: record[0]):
+            if hasattr(timestamp, "timestamp"):
+                timestamp = timestamp.replace(tzinfo=timezone.utc).timestamp()
+            self.record(emotion, timestamp)
+            loaded += 1
+        logger.debug(f"Rehydrated mood tracker with {loaded} detections.")
@@ -0,0 +1,313 @@
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from logger import logger
+
+# Rows of int8 codes converted to float32 at a time when scoring; small enough for the block to stay in cache.
+SCORE_BLOCK_ROWS = 512
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize(vectors: np.ndarray) -> tuple:
+    """Symmetric per-row int8 quantization; returns codes and the scale of every row."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _map_rows(target, rows: int, dim: int) -> np.memmap:
+    """Map `rows` float32 rows of `target` (a path or file object) read-write, growing the file if needed."""
+    size = rows * dim * np.dtype(np.float32).itemsize
+    if isinstance(target, str):
+        if not os.path.exists(target) or os.path.getsize(target) < size:
+            with open(target, "ab") as f:
+                f.truncate(size)
+    else:
+        target.seek(0, os.SEEK_END)
+        if target.tell() < size:
+            target.truncate(size)
+    return np.memmap(target, dtype=np.float32, mode="r+", shape=(rows, dim))
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Minimal in-process vector store for a single student's materials.
+
+    Normalized embeddings live in one contiguous float32 matrix and top-k is a single
+    matrix-vector product. With `quantize=True` only an int8 copy of the matrix is kept
+    in memory: it is scanned block by block and the best `rescore_factor * k`
+    candidates are rescored with the float vectors, which stay in a file-backed map
+    (`vectors.f32` under `path`, or a temporary file) so only those rows are paged in.
+    `save` writes the matrices as raw files that `load` maps back with `np.memmap`, so
+    an index opened from disk only pages in the rows it touches.
+
+    Lookups by id or source mirror the subset of the Chroma collection API that
+    `QAGenerator` uses (`get`, `delete`, `count`).
+    """
+
+    def __init__(self, embedding, path: str = None, quantize: bool = False, rescore_factor: int = 4):
+        self.embedding = embedding
+        self.path = path
+        self.quantize = quantize
+        self.rescore_factor = rescore_factor
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self._rows = {}
+        self._vectors = None
+        self._codes = None
+        self._scales = None
+        self._spill = None
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Approximate resident size of the vector matrices and stored texts."""
+        total = sum(len(text) for text in self.texts)
+        for array in (self._vectors, self._codes, self._scales):
+            if array is not None and not isinstance(array, np.memmap):
+                total += array.nbytes
+        return total
+
+    def _vector_file(self):
+        """File backing the float vectors of a quantized store."""
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            return os.path.join(self.path, "vectors.f32")
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile()
+        return self._spill
+
+    def _ensure_capacity(self, dim: int, extra: int):
+        """Make room for `extra` rows; read-only maps opened by `load` are copied into memory first."""
+        n = len(self.ids)
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        grow = n + extra > capacity
+        if grow:
+            capacity = max(n + extra, 2 * capacity, 256)
+        if self.quantize:
+            if grow or not self._codes.flags.writeable:
+                codes = np.zeros((capacity, dim), dtype=np.int8)
+                scales = np.zeros(capacity, dtype=np.float32)
+                if n:
+                    codes[:n] = self._codes[:n]
+                    scales[:n] = self._scales[:n]
+                self._codes, self._scales = codes, scales
+            if grow:
+                if self._vectors is not None:
+                    self._vectors.flush()
+                self._vectors = _map_rows(self._vector_file(), capacity, dim)
+        elif grow or not self._vectors.flags.writeable:
+            vectors = np.zeros((capacity, dim), dtype=np.float32)
+            if n:
+                vectors[:n] = self._vectors[:n]
+            self._vectors = vectors
+
+    def add_texts(self, texts, metadatas=None, ids=None, embeddings=None, **kwargs) -> list:
+        """
+        Add texts, embedding them unless precomputed `embeddings` are given.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [os.urandom(16).hex() for _ in texts]
+        if embeddings is None:
+            embeddings = self.embedding.embed_documents(texts)
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            self.delete([i for i in ids if i in self._rows])
+            self._ensure_capacity(vectors.shape[1], len(texts))
+            start = len(self.ids)
+            self._vectors[start:start + len(texts)] = vectors
+            if self.quantize:
+                codes, scales = _quantize(vectors)
+                self._codes[start:start + len(texts)] = codes
+                self._scales[start:start + len(texts)] = scales
+            for offset, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                self._rows[doc_id] = start + offset
+                self.ids.append(doc_id)
+                self.texts.append(text)
+                self.metadatas.append(metadata or {})
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        """Remove rows by id, moving the last row into each freed slot."""
+        with self._lock:
+            for doc_id in ids or []:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+                self._ensure_capacity(self._vectors.shape[1], 0)
+                last = len(self.ids) - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    if self.quantize:
+                        self._codes[row] = self._codes[last]
+                        self._scales[row] = self._scales[last]
+                    self.ids[row] = self.ids[last]
+                    self.texts[row] = self.texts[last]
+                    self.metadatas[row] = self.metadatas[last]
+                    self._rows[self.ids[row]] = row
+                self.ids.pop()
+                self.texts.pop()
+                self.metadatas.pop()
+        return True
+
+    def get(self, ids=None, where=None, limit=None, include=("metadatas", "documents"), **kwargs) -> dict:
+        """
+        Chroma-style lookup by ids and/or an equality `where` filter on metadata.
+        """
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            else:
+                rows = range(len(self.ids))
+            if where:
+                rows = [row for row in rows
+                        if all(self.metadatas[row].get(key) == value for key, value in where.items())]
+            rows = list(rows)[:limit] if limit else list(rows)
+            result = {"ids": [self.ids[row] for row in rows]}
+            if "metadatas" in include:
+                result["metadatas"] = [self.metadatas[row] for row in rows]
+            if "documents" in include:
+                result["documents"] = [self.texts[row] for row in rows]
+        return result
+
+    def _top_k(self, query: np.ndarray, k: int) -> tuple:
+        n = len(self.ids)
+        if n == 0:
+            return np.array([], dtype=int), np.array([], dtype=np.float32)
+        k = min(k, n)
+        if self.quantize:
+            approx = self._approx_scores(query, n)
+            candidates = min(n, k * self.rescore_factor)
+            rows = np.sort(np.argpartition(-approx, candidates - 1)[:candidates])
+            scores = self._vectors[rows] @ query
+        else:
+            scores = self._vectors[:n] @ query
+            rows = np.arange(n)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return rows[best], scores[best]
+
+    def _approx_scores(self, query: np.ndarray, n: int) -> np.ndarray:
+        """
+        Scores of the first `n` rows against their int8 codes, converting one block of
+        `SCORE_BLOCK_ROWS` codes at a time instead of the whole matrix.
+        """
+        scores = np.empty(n, dtype=np.float32)
+        block = np.empty((min(n, SCORE_BLOCK_ROWS), query.shape[0]), dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, n)
+            rows = block[:stop - start]
+            np.copyto(rows, self._codes[start:stop])
+            np.dot(rows, query, out=scores[start:stop])
+        scores *= self._scales[:n]
+        return scores
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4) -> list:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            rows, scores = self._top_k(query, k)
+            return [
+                (Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row]), float(score))
+                for row, score in zip(rows, scores)
+            ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_by_vector_with_score(self.embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> list:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def save(self, path: str = None):
+        """
+        Write the store to `path`: raw matrices for `np.memmap` plus a JSON file with
+        ids, texts and metadata. The float vectors of a quantized store that are already
+        mapped from `path` are flushed in place.
+        """
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            n = len(self.ids)
+            dim = self._vectors.shape[1] if self._vectors is not None else 0
+            arrays = {"vectors.f32": self._vectors}
+            if self.quantize:
+                arrays.update({"codes.i8": self._codes, "scales.f32": self._scales})
+            if (isinstance(self._vectors, np.memmap) and self._vectors.flags.writeable
+                    and self._vectors.filename == os.path.abspath(os.path.join(path, "vectors.f32"))):
+                self._vectors.flush()
+                del arrays["vectors.f32"]
+            for name, array in arrays.items():
+                if array is not None and n:
+                    np.ascontiguousarray(array[:n]).tofile(os.path.join(path, f"{name}.tmp"))
+                    os.replace(os.path.join(path, f"{name}.tmp"), os.path.join(path, name))
+            meta = {"count": n, "dim": dim, "quantize": self.quantize,
+                    "ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}
+            with open(os.path.join(path, "store.json.tmp"), "w") as f:
+                json.dump(meta, f)
+            os.replace(os.path.join(path, "store.json.tmp"), os.path.join(path, "store.json"))
+
+    @classmethod
+    def load(cls, path: str, embedding, quantize: bool = False, **kwargs):
+        """
+        Open a store saved with `save`, memory-mapping its matrices read-only; the first
+        write copies them into memory, except the float vectors of a quantized store,
+        which are mapped read-write. Returns an empty store if nothing is saved yet.
+        """
+        store = cls(embedding, path=path, quantize=quantize, **kwargs)
+        meta_path = os.path.join(path, "store.json")
+        if not os.path.exists(meta_path):
+            return store
+        with open(meta_path) as f:
+            meta = json.load(f)
+        n, dim = meta["count"], meta["dim"]
+        store.ids, store.texts, store.metadatas = meta["ids"], meta["texts"], meta["metadatas"]
+        store._rows = {doc_id: row for row, doc_id in enumerate(store.ids)}
+        if n:
+            if quantize:
+                store._vectors = _map_rows(os.path.join(path, "vectors.f32"), n, dim)
+            else:
+                store._vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(n, dim))
+            if quantize and meta.get("quantize"):
+                store._codes = np.memmap(os.path.join(path, "codes.i8"), dtype=np.int8, mode="r", shape=(n, dim))
+                store._scales = np.memmap(os.path.join(path, "scales.f32"), dtype=np.float32, mode="r", shape=(n,))
+            elif quantize:
+                store._codes, store._scales = _quantize(np.asarray(store._vectors))
+        logger.debug(f"Loaded NumPy vector store with {n} vectors from '{path}'.")
+        return store
@@ -1,76 +1,407 @@
 import streamlit as st
-from langchain_huggingface import HuggingFaceEndpoint, HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, WebBaseLoader
+from langchain_community.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
 from langchain.docstore.document import Document
+from components.ingestion import PdfIngestionJob
+from components.hybrid_retriever import BM25Index, HybridRetriever
+from components.model_registry import get_embeddings, get_qa_llm, get_reranker
+from components.numpy_store import NumpyVectorStore
+from components.response_cache import ResponseCache
+from components.url_ingestion import fetch_pages, parse_url_input
 from logger import logger
+from metrics import metrics
 import chromadb
+import asyncio
+import hashlib
+import json
 import os
+import re
+import tempfile
+import threading
+
+INDEX_DIR = os.getenv("SIDEKICK_INDEX_DIR", "indexes")
+VECTOR_BACKEND = os.getenv("SIDEKICK_VECTOR_BACKEND", "chroma")
+VECTOR_QUANTIZE = os.getenv("SIDEKICK_VECTOR_QUANTIZE", "none")
+RETRIEVAL_MODE = os.getenv("SIDEKICK_RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_K = int(os.getenv("SIDEKICK_RETRIEVAL_K", "4"))
+RERANK = os.getenv("SIDEKICK_RERANK", "0") == "1"
+# Bytes per stored chunk assumed for Chroma collections (float32 MiniLM vector plus HNSW links).
+CHROMA_BYTES_PER_CHUNK = 384 * 4 + 512
+ANSWER_CACHE_SIZE = int(os.getenv("SIDEKICK_ANSWER_CACHE_SIZE", "256"))
+NO_ANSWER = "I couldn't generate a specific answer based on the context."
+QA_ERROR_RESPONSE = "I encountered an error while processing your question. Please try again."
+ERROR_RESPONSE = "I'm sorry, I couldn't generate a response due to an error."
+
+_chroma_clients = {}
+_chroma_clients_lock = threading.Lock()
+
+
+def _open_chroma_client(path: str):
+    """Open the persistent Chroma client of an index directory, counting its users."""
+    with _chroma_clients_lock:
+        client = chromadb.PersistentClient(path=path)
+        _chroma_clients[path] = _chroma_clients.get(path, 0) + 1
+        return client
+
+
+# chromadb releases whose private per-path system cache `_stop_chroma_system` knows.
+CHROMA_SYSTEM_CACHE_VERSIONS = ("0.5.", "0.6.")
+
+
+def _stop_chroma_system(client) -> bool:
+    """
+    Stop the chromadb system behind `client` and drop it from chromadb's per-path cache.
+
+    The cache (`SharedSystemClient._identifier_to_system`) is private API, so this only
+    runs on the releases listed in `CHROMA_SYSTEM_CACHE_VERSIONS` and when the cache
+    looks as expected; otherwise the system is left alone.
+
+    :return: True if the system was stopped.
+    """
+    if not chromadb.__version__.startswith(CHROMA_SYSTEM_CACHE_VERSIONS):
+        return False
+    try:
+        from chromadb.api.shared_system_client import SharedSystemClient
+    except ImportError:
+        return False
+    systems = getattr(SharedSystemClient, "_identifier_to_system", None)
+    identifier = getattr(client, "_identifier", None)
+    if not isinstance(systems, dict) or identifier not in systems:
+        return False
+    systems.pop(identifier).stop()
+    return True
+
+
+def _close_chroma_client(client, path: str) -> bool:
+    """
+    Drop one user of the Chroma client of `path`. chromadb caches one system per path
+    for the life of the process, so dropping the client object alone frees nothing; the
+    last user stops that system and removes it from the cache, which unloads its
+    HNSW segments.
+
+    :return: True if the system was stopped, False if other sessions still use it.
+    :raises RuntimeError: If this chromadb version's system cache cannot be cleared.
+    """
+    with _chroma_clients_lock:
+        remaining = _chroma_clients.get(path, 1) - 1
+        if remaining > 0:
+            _chroma_clients[path] = remaining
+            return False
+        _chroma_clients.pop(path, None)
+        if not _stop_chroma_system(client):
+            raise RuntimeError(f"cannot unload Chroma system of chromadb {chromadb.__version__}; it stays cached")
+        return True
+
+
+QA_PROMPT = PromptTemplate(
+    template="""Based on the following context, provide a detailed and accurate answer to the question. If the context doesn't contain enough information, say so.
+
+Context: {context}
+
+Question: {question}
+
+Answer:""",
+    input_variables=["context", "question"]
+)
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", value).strip("-_") or "default"
+
+
+def collection_name(course_id: str) -> str:
+    """
+    Build a valid Chroma collection name (3-63 chars, alphanumeric at both ends) for a course.
+    """
+    name = f"course-{_safe_name(course_id)}"[:63]
+    return name.rstrip("-_")
+
+
+def hf_token() -> str:
+    """
+    Return the HuggingFace API token from Streamlit secrets or, when there is no
+    secrets file (scripts, benchmarks), from `HUGGINGFACE_API_KEY`.
+    """
+    try:
+        token = st.secrets.get("hf_api_key")
+    except Exception:
+        token = None
+    return token or os.getenv("HUGGINGFACE_API_KEY")
+
+
+def chunk_id(source: str, text: str) -> str:
+    """
+    Stable id for a chunk: the hash of its source and content.
+
+    Re-processing a source yields the same ids for unchanged chunks, so they are never re-embedded.
+    """
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
 
 class QAGenerator:
-    def __init__(self):
+    def __init__(self, user_id: str = "default", course_id: str = "general", index_dir: str = INDEX_DIR,
+                 backend: str = VECTOR_BACKEND):
         logger.debug("Initializing QAGenerator with LangChain and HuggingFace.")
         
-        self.hf_token = st.secrets.get("hf_api_key") or os.getenv("HUGGINGFACE_API_KEY")
+        self.hf_token = hf_token()
         if not self.hf_token:
             raise ValueError("HuggingFace API token not found in environment or secrets")
         
-        self.llm = HuggingFaceEndpoint(
-            repo_id="mistralai/Mistral-7B-Instruct-v0.3",
-            max_length=128,
-            temperature=0.7,
-            token=self.hf_token
-        )
+        self.llm = get_qa_llm(self.hf_token)
+        self.embeddings = get_embeddings()
         
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50
         )
-        
         self.retriever = None
+        self.qa_chain = None
         self.db = None
-        self.chroma_client = chromadb.Client()
-    
-    def process_documents(self, input_type: str, input_data) -> bool:
+        self.bm25 = None
+        self.released = False
+        self.retained_bytes = 0
+        self.ingestion_job = None
+        # Held for every use or change of the index (and by background ingestion batches),
+        # so the script thread, an ingestion job and session eviction never overlap.
+        self.index_lock = threading.RLock()
+        self.closed = False
+        self.index_version = 0
+        # Exact-match only: answers are keyed by index version, question and retrieved chunk ids.
+        self.answer_cache = ResponseCache(embeddings=None, max_entries=ANSWER_CACHE_SIZE)
+        self.user_id = user_id
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector backend '{backend}', expected 'chroma' or 'numpy'")
+        self.backend = backend
+        self.index_path = os.path.join(index_dir, _safe_name(user_id))
+        os.makedirs(self.index_path, exist_ok=True)
+        self.chroma_client = None
+        self.set_course(course_id)
+
+    def set_course(self, course_id: str):
+        """
+        Open (or create) the persistent index of the given course.
+
+        :param course_id: Course whose study materials should be used.
+        """
+        with self.index_lock:
+            if self.busy:
+                raise RuntimeError("Cannot switch course while a PDF is being indexed.")
+            self._open_course(course_id)
+
+    def _open_course(self, course_id: str):
+        self.course_id = course_id
+        self._source_hashes_path = os.path.join(self.index_path, f"{collection_name(course_id)}.sources.json")
+        self._source_hashes = {}
+        if os.path.exists(self._source_hashes_path):
+            with open(self._source_hashes_path) as f:
+                self._source_hashes = json.load(f)
+        if self.backend == "chroma" and self.chroma_client is None:
+            self.chroma_client = _open_chroma_client(self.index_path)
+        self.released = False
+        self.retained_bytes = 0
+        if self.backend == "numpy":
+            self.db = NumpyVectorStore.load(
+                os.path.join(self.index_path, collection_name(course_id)),
+                self.embeddings,
+                quantize=(VECTOR_QUANTIZE == "int8")
+            )
+        else:
+            self.db = Chroma(
+                client=self.chroma_client,
+                collection_name=collection_name(course_id),
+                embedding_function=self.embeddings
+            )
+        self._load_keyword_index()
+        self._refresh_retriever()
+        logger.info(f"Opened index for user '{self.user_id}', course '{course_id}'.")
+
+    @property
+    def busy(self) -> bool:
+        """True while a background ingestion is writing to the index."""
+        return self.ingestion_job is not None and self.ingestion_job.running
+
+    def memory_bytes(self) -> int:
+        """
+        Estimate the memory held by the open index: vectors, texts and the keyword index.
+        A released index counts whatever could not be freed.
+        """
+        if self.released:
+            return self.retained_bytes
+        if self.db is None:
+            return 0
+        total = self.bm25.nbytes() if self.bm25 is not None else 0
+        if self.backend == "numpy":
+            total += self.db.nbytes()
+        else:
+            total += self._count() * CHROMA_BYTES_PER_CHUNK
+        return total
+
+    def release(self):
+        """
+        Drop the in-memory index of this student; everything is already on disk and
+        `ensure_loaded` reopens it.
+        """
+        with self.index_lock:
+            if self.released:
+                return
+            retained_bytes = 0
+            if self.db is not None:
+                self._persist()
+            if self.chroma_client is not None:
+                try:
+                    _close_chroma_client(self.chroma_client, self.index_path)
+                except Exception as e:
+                    retained_bytes = self.memory_bytes()
+                    logger.error(f"Failed to close Chroma client of user '{self.user_id}': {e}")
+            self.db = None
+            self.bm25 = None
+            self.retriever = None
+            self.qa_chain = None
+            self.chroma_client = None
+            self.answer_cache.clear()
+            self.released = True
+            self.retained_bytes = retained_bytes
+        logger.info(f"Released index of user '{self.user_id}', course '{self.course_id}'.")
+
+    def ensure_loaded(self):
+        """Reopen the index after `release`."""
+        with self.index_lock:
+            if self.released:
+                self._open_course(self.course_id)
+
+    def _count(self) -> int:
+        if self.backend == "numpy":
+            return self.db.count()
+        return self.db._collection.count()
+
+    def _persist(self):
+        # Chroma writes through on every change; the NumPy store is saved explicitly.
+        if self.backend == "numpy":
+            self.db.save()
+
+    def _load_keyword_index(self):
+        """Build the BM25 index of the current course from the chunks stored in the vector store."""
+        self.bm25 = BM25Index()
+        if RETRIEVAL_MODE != "hybrid":
+            return
+        stored = self.db.get(include=["documents", "metadatas"])
+        for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+            self.bm25.add(doc_id, Document(page_content=text, metadata=metadata or {}))
+        logger.debug(f"Built keyword index with {len(self.bm25)} chunks.")
+
+    def _refresh_retriever(self):
+        """
+        Rebuild the retriever and QA chain after the index changed.
+
+        Every call starts a new index version, which invalidates the cached answers.
+        """
+        self.index_version += 1
+        self.answer_cache.clear()
+        count = self._count()
+        if not count:
+            self.retriever = None
+            self.qa_chain = None
+            return
+        if RETRIEVAL_MODE == "hybrid":
+            self.retriever = HybridRetriever(
+                vector_store=self.db,
+                bm25=self.bm25,
+                k=min(RETRIEVAL_K, count),
+                reranker=get_reranker() if RERANK else None
+            )
+        else:
+            k = min(RETRIEVAL_K, count)
+            self.retriever = self.db.as_retriever(search_kwargs={"k": k})
+        self.qa_chain = RetrievalQA.from_chain_type(
+            llm=self.llm,
+            chain_type="stuff",
+            retriever=self.retriever,
+            chain_type_kwargs={"prompt": QA_PROMPT}
+        )
+
+    def _save_upload(self, input_data) -> tuple:
+        """
+        Return a path on disk for a PDF upload and whether it is a temporary copy.
+        """
+        if isinstance(input_data, str):
+            return input_data, False
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(input_data.getvalue())
+            return tmp.name, True
+
+    def start_pdf_ingestion(self, input_data, source: str = None) -> PdfIngestionJob:
+        """
+        Start indexing a PDF in the background.
+
+        Pages are parsed in a process pool and indexed batch by batch as they arrive, so
+        the already-indexed pages can be queried while the rest is still being processed.
+
+        :param input_data: Uploaded PDF or path to a PDF.
+        :param source: Name under which the PDF is indexed; defaults to its file name.
+        :return: The running ingestion job, which reports progress.
+        """
+        with self.index_lock:
+            if self.busy:
+                raise RuntimeError("Another PDF is still being indexed.")
+            self.ensure_loaded()
+            path, temporary = self._save_upload(input_data)
+            source = source or getattr(input_data, "name", os.path.basename(str(input_data)))
+            job = PdfIngestionJob(self, path, source, delete_path=temporary)
+            self.ingestion_job = job
+            job.start()
+            return job
+
+    def process_documents(self, input_type: str, input_data, source: str = None) -> bool:
+        """
+        Add a source to the course index, embedding only chunks that are not indexed yet.
+
+        Re-processing a source keeps its unchanged chunks, embeds new ones and drops
+        chunks that no longer appear in it.
+
+        :param input_type: One of "PDF", "URL" or "Text".
+        :param input_data: Uploaded PDF (or path), URL string, or raw text.
+        :param source: Name under which the material is indexed; defaults to the file name, URL or "user_input".
+        :return: True if the index was updated.
+        """
         try:
             if input_type == "PDF":
-                loader = PyPDFLoader(input_data)
-                documents = loader.load()
+                path, temporary = self._save_upload(input_data)
+                source = source or getattr(input_data, "name", os.path.basename(str(input_data)))
+                with self.index_lock:
+                    self.ensure_loaded()
+                    job = PdfIngestionJob(self, path, source, delete_path=temporary)
+                    job.run()
+                if job.error:
+                    raise RuntimeError(job.error)
+                return True
             elif input_type == "URL":
-                loader = WebBaseLoader(input_data)
-                documents = loader.load()
+                urls = parse_url_input(input_data)
+                if not urls:
+                    st.error("Please enter at least one http(s) URL.")
+                    return False
+                summary = self.ingest_urls(urls)
+                return summary["failed"] < summary["pages"]
             elif input_type == "Text":
                 documents = [Document(page_content=input_data, metadata={"source": "user_input"})]
+                default_source = "user_input"
             else:
                 st.error("Unsupported input type.")
                 return False
+            source = source or default_source
 
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=500,
-                chunk_overlap=50
-            )
-            docs = text_splitter.split_documents(documents)
+            with metrics.span("ingest_stage", stage="split"):
+                docs = self.text_splitter.split_documents(documents)
             logger.info(f"Processed and split documents into {len(docs)} chunks.")
 
-            try:
-                self.chroma_client.delete_collection("study_materials")
-            except:
-                pass
-
-            self.db = Chroma.from_documents(
-                documents=docs,
-                embedding=self.embeddings,
-                client=self.chroma_client,
-                collection_name="study_materials"
-            )
-            
-            k = min(2, len(docs))
-            self.retriever = self.db.as_retriever(search_kwargs={"k": k})
-            logger.info("Index created and retriever is ready.")
+            with self.index_lock:
+                self.ensure_loaded()
+                added, removed = self._index_chunks(source, docs)
+                self._refresh_retriever()
+            logger.info(f"Index updated for '{source}': {added} chunks added, {removed} removed, "
+                        f"{len(docs) - added} reused.")
             return True
             
         except Exception as e:
@@ -78,46 +409,205 @@ class QAGenerator:
             st.error(f"Failed to create index from the provided input: {str(e)}")
             return False
 
+    def ingest_urls(self, urls: list) -> dict:
+        """
+        Fetch pages (or sitemaps) concurrently and index the ones whose content changed.
+
+        Pages answered with `304 Not Modified` are served from the local HTTP cache, and a
+        page whose extracted text hashes to what is already indexed is skipped entirely.
+
+        :param urls: Page or sitemap URLs; each page is indexed as its own source.
+        :return: Counts of pages, changed, unchanged and failed pages, and chunks added.
+        """
+        with metrics.span("ingest_stage", stage="fetch"):
+            results = asyncio.run(fetch_pages(urls))
+        summary = {"pages": len(results), "changed": 0, "unchanged": 0, "failed": 0, "chunks_added": 0}
+        with self.index_lock:
+            self.ensure_loaded()
+            for result in results:
+                if result.status == "failed":
+                    summary["failed"] += 1
+                    continue
+                page_hash = result.content_hash
+                if self._source_hashes.get(result.url) == page_hash:
+                    summary["unchanged"] += 1
+                    continue
+                documents = [Document(page_content=result.text, metadata={"source": result.url})]
+                with metrics.span("ingest_stage", stage="split"):
+                    docs = self.text_splitter.split_documents(documents)
+                added, removed = self._index_chunks(result.url, docs)
+                self._source_hashes[result.url] = page_hash
+                summary["changed"] += 1
+                summary["chunks_added"] += added
+            self._save_source_hashes()
+            self._refresh_retriever()
+        logger.info(f"Ingested {summary['pages']} URLs: {summary['changed']} changed, "
+                    f"{summary['unchanged']} unchanged, {summary['failed']} failed.")
+        return summary
+
+    def _save_source_hashes(self):
+        tmp_path = f"{self._source_hashes_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._source_hashes, f)
+        os.replace(tmp_path, self._source_hashes_path)
+
+    def _key_chunks(self, source: str, docs, seen: set = None) -> tuple:
+        """
+        Assign content-hash ids to chunks of `source`, skipping duplicates.
+
+        :param seen: Ids already assigned earlier in the same ingestion; updated in place.
+        :return: Lists of ids and of the matching chunks.
+        """
+        seen = set() if seen is None else seen
+        ids = []
+        unique_docs = []
+        for doc in docs:
+            cid = chunk_id(source, doc.page_content)
+            if cid in seen:
+                continue
+            seen.add(cid)
+            doc.metadata["source"] = source
+            doc.metadata["chunk_id"] = cid
+            ids.append(cid)
+            unique_docs.append(doc)
+        return ids, unique_docs
+
+    def _add_chunks(self, ids: list, docs: list) -> int:
+        """
+        Embed and store the chunks whose ids are not in the index yet.
+
+        :return: Number of chunks added.
+        """
+        if not ids:
+            return 0
+        existing = set(self.db.get(ids=ids, include=[])["ids"])
+        new_ids = [cid for cid in ids if cid not in existing]
+        new_docs = [doc for cid, doc in zip(ids, docs) if cid not in existing]
+        if new_docs:
+            texts = [doc.page_content for doc in new_docs]
+            with metrics.span("ingest_stage", stage="embed"):
+                vectors = self.embeddings.embed_documents(texts)
+            with metrics.span("ingest_stage", stage="index"):
+                self._store_vectors(new_ids, texts, [doc.metadata for doc in new_docs], vectors)
+                self._persist()
+            metrics.inc("chunks_embedded_total", len(new_docs))
+            if RETRIEVAL_MODE == "hybrid":
+                for cid, doc in zip(new_ids, new_docs):
+                    self.bm25.add(cid, doc)
+        return len(new_docs)
+
+    def _store_vectors(self, ids: list, texts: list, metadatas: list, vectors: list):
+        """Write already-embedded chunks to the vector store."""
+        if self.backend == "numpy":
+            self.db.add_texts(texts, metadatas=metadatas, ids=ids, embeddings=vectors)
+        else:
+            self.db._collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+
+    def _remove_stale_chunks(self, source: str, keep_ids) -> int:
+        """
+        Delete chunks of `source` that are not in `keep_ids`.
+
+        :return: Number of chunks removed.
+        """
+        existing = set(self.db.get(where={"source": source}, include=[])["ids"])
+        stale = existing.difference(keep_ids)
+        if stale:
+            self.db.delete(ids=list(stale))
+            self._persist()
+            for cid in stale:
+                self.bm25.remove(cid)
+        return len(stale)
+
+    def _index_chunks(self, source: str, docs) -> tuple:
+        """
+        Sync the chunks stored for `source` with `docs`.
+
+        :return: Number of chunks added and number of stale chunks removed.
+        """
+        ids, unique_docs = self._key_chunks(source, docs)
+        added = self._add_chunks(ids, unique_docs)
+        removed = self._remove_stale_chunks(source, ids)
+        return added, removed
+
+    def list_sources(self) -> dict:
+        """
+        Return the indexed sources of the current course with their chunk counts.
+        """
+        with self.index_lock:
+            self.ensure_loaded()
+            metadatas = self.db.get(include=["metadatas"])["metadatas"]
+        sources = {}
+        for metadata in metadatas:
+            source = (metadata or {}).get("source", "unknown")
+            sources[source] = sources.get(source, 0) + 1
+        return sources
+
+    def remove_source(self, source: str) -> int:
+        """
+        Delete every chunk of `source` from the current course index.
+
+        :param source: Source name as returned by `list_sources`.
+        :return: Number of chunks removed.
+        """
+        with self.index_lock:
+            self.ensure_loaded()
+            ids = self.db.get(where={"source": source}, include=[])["ids"]
+            if ids:
+                self.db.delete(ids=ids)
+                self._persist()
+                for cid in ids:
+                    self.bm25.remove(cid)
+            if self._source_hashes.pop(source, None) is not None:
+                self._save_source_hashes()
+            self._refresh_retriever()
+        logger.info(f"Removed {len(ids)} chunks of '{source}' from course '{self.course_id}'.")
+        return len(ids)
+
     def create_response(self, query: str) -> str:
-        if not self.retriever:
-            st.error("No index available. Please add and process study materials first.")
-            return ""
-        
-        try:
-            prompt_template = """Based on the following context, provide a detailed and accurate answer to the question. If the context doesn't contain enough information, say so.
+        """
+        Answer a question from the current course index.
 
-Context: {context}
+        Chunks are retrieved first; if the same question was already answered from the
+        same chunks in this index version, the cached answer is returned without calling
+        the LLM.
 
-Question: {question}
+        :param query: Student question.
+        :return: The answer text.
+        """
+        try:
+            with self.index_lock:
+                self.ensure_loaded()
+                retriever, qa_chain, version = self.retriever, self.qa_chain, self.index_version
+                if not retriever:
+                    st.error("No index available. Please add and process study materials first.")
+                    return ""
+                with metrics.span("qa_stage", stage="retrieve"):
+                    docs = retriever.invoke(query)
+            chunk_ids = ",".join(doc.metadata.get("chunk_id", "") for doc in docs)
+            namespace = f"{version}:{chunk_ids}"
+            answer = self.answer_cache.get(query, namespace)
+            metrics.inc("answer_cache_lookups_total", result="hit" if answer is not None else "miss")
+            if answer is not None:
+                logger.info("Answer cache hit for query '%s'.", query)
+                return answer
 
-Answer:"""
-            
-            PROMPT = PromptTemplate(
-                template=prompt_template,
-                input_variables=["context", "question"]
-            )
-            
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.retriever,
-                chain_type_kwargs={"prompt": PROMPT}
-            )
-            
             try:
-                response = qa_chain.invoke({"query": query})
-                answer = response.get("result", "").strip()
-                if not answer:
-                    answer = "I couldn't generate a specific answer based on the context."
+                with metrics.span("qa_stage", stage="generate"):
+                    response = qa_chain.combine_documents_chain.invoke({"input_documents": docs, "question": query})
+                answer = response.get("output_text", "").strip()
+                if answer:
+                    self.answer_cache.put(query, namespace, answer)
+                else:
+                    answer = NO_ANSWER
             except Exception as e:
                 logger.error(f"Error in QA chain: {str(e)}")
-                answer = "I encountered an error while processing your question. Please try again."
-            
-            logger.info(f"Generated answer for query '{query}': {answer}")
+                answer = QA_ERROR_RESPONSE
+
+            logger.info("Generated answer for query '%s': %s", query, answer)
             return answer
-            
+
         except Exception as e:
             error_msg = f"Error generating response for query '{query}': {str(e)}"
             logger.error(error_msg)
             st.error("An error occurred while generating the response.")
-            return "I'm sorry, I couldn't generate a response due to an error."
\ No newline at end of file
+            return ERROR_RESPONSE
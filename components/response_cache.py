@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from components.embedding_cache import normalize_text
+from components.model_registry import get_embeddings
+from logger import logger
+
+SIMILARITY_THRESHOLD = float(os.getenv("SIDEKICK_RESPONSE_CACHE_THRESHOLD", "0.95"))
+TTL_SECONDS = float(os.getenv("SIDEKICK_RESPONSE_CACHE_TTL", "3600"))
+MAX_ENTRIES = int(os.getenv("SIDEKICK_RESPONSE_CACHE_SIZE", "1000"))
+
+
+def cache_namespace(model_name: str, **params) -> str:
+    """
+    Namespace responses by model and sampling parameters; only prompts within the
+    same namespace can be served from each other's cached responses.
+    """
+    return json.dumps({"model": model_name, **params}, sort_keys=True, default=str)
+
+
+class ResponseCache:
+    """
+    Two-tier LLM response cache.
+
+    The exact tier matches the normalized prompt; the semantic tier embeds the prompt
+    and reuses a cached response whose prompt has cosine similarity of at least
+    `similarity_threshold`. Entries expire after `ttl_seconds` and the least recently
+    used entry is evicted once `max_entries` is reached.
+
+    For templated prompts callers pass the variable part as `semantic_text` (the task,
+    the question). Only that part is embedded, and only prompts built from the same
+    template around it are compared; otherwise the fixed template text dominates the
+    similarity and "Calculus I" would be served the guide for "Calculus II".
+    """
+
+    def __init__(self, embeddings=None, similarity_threshold: float = SIMILARITY_THRESHOLD,
+                 ttl_seconds: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._recent_vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prompt: str, namespace: str) -> str:
+        return hashlib.sha256(f"{namespace}\0{normalize_text(prompt)}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _scope(prompt: str, namespace: str, semantic_text: str = None) -> str:
+        """Prompts are only compared semantically within the same namespace and template."""
+        template = prompt.replace(semantic_text, "\0") if semantic_text else ""
+        return hashlib.sha256(f"{namespace}\0{normalize_text(template)}".encode("utf-8")).hexdigest()
+
+    def _embed(self, key: str, text: str):
+        if self.embeddings is None:
+            return None
+        with self._lock:
+            vector = self._recent_vectors.get(key)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(normalize_text(text)), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+            with self._lock:
+                self._recent_vectors[key] = vector
+                if len(self._recent_vectors) > 64:
+                    self._recent_vectors.popitem(last=False)
+        return vector
+
+    def _expire_locked(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, prompt: str, namespace: str, semantic_text: str = None):
+        """
+        Return a cached response for `prompt`, or None on a miss.
+
+        :param prompt: Prompt sent to the model.
+        :param namespace: Namespace built by `cache_namespace`.
+        :param semantic_text: Variable part of a templated prompt, compared instead of the whole prompt.
+        """
+        key = self._key(prompt, namespace)
+        scope = self._scope(prompt, namespace, semantic_text)
+        now = time.time()
+        with self._lock:
+            self._expire_locked(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["response"]
+            candidates = [(k, e) for k, e in self._entries.items()
+                          if e["scope"] == scope and e["vector"] is not None]
+
+        if candidates:
+            vector = self._embed(key, semantic_text or prompt)
+            if vector is not None:
+                similarities = np.stack([e["vector"] for _, e in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    best_key, best_entry = candidates[best]
+                    with self._lock:
+                        if best_key in self._entries:
+                            self._entries.move_to_end(best_key)
+                        self.semantic_hits += 1
+                    logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f}).")
+                    return best_entry["response"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, namespace: str, response: str, semantic_text: str = None):
+        """
+        Cache `response` for `prompt`.
+
+        :param prompt: Prompt sent to the model.
+        :param namespace: Namespace built by `cache_namespace`.
+        :param response: Completion returned by the model.
+        :param semantic_text: Variable part of a templated prompt, as passed to `get`.
+        """
+        key = self._key(prompt, namespace)
+        vector = self._embed(key, semantic_text or prompt)
+        with self._lock:
+            self._entries[key] = {
+                "scope": self._scope(prompt, namespace, semantic_text),
+                "response": response,
+                "vector": vector,
+                "created": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, using the shared MiniLM embedder for the semantic tier."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(embeddings=get_embeddings())
+        return _response_cache
+
+
+def current_response_cache():
+    """Return the response cache if it has been created, else None."""
+    return _response_cache
@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+from components.model_registry import _rss_bytes
+from logger import logger
+from metrics import metrics
+
+SESSION_MEMORY_BUDGET = int(float(os.getenv("SIDEKICK_SESSION_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024)
+SESSION_IDLE_SECONDS = float(os.getenv("SIDEKICK_SESSION_IDLE_SECONDS", "900"))
+SESSION_SWEEP_SECONDS = float(os.getenv("SIDEKICK_SESSION_SWEEP_SECONDS", "30"))
+# Sessions seen more recently than this are never evicted for the budget, so an index
+# is not dropped under a student who is actively using it.
+SESSION_MIN_IDLE_SECONDS = float(os.getenv("SIDEKICK_SESSION_MIN_IDLE_SECONDS", "60"))
+
+
+def _session_is_active(session_id: str) -> bool:
+    """Ask the Streamlit runtime whether the browser session still exists."""
+    try:
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return True
+        return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+
+class SessionEntry:
+    """Resources and bookkeeping of one browser session."""
+
+    def __init__(self, session_id: str, user_id: str):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.qa_generator = None
+        self.on_close = []
+        self.state_bytes = 0
+        self.last_seen = time.monotonic()
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def footprint(self) -> int:
+        index_bytes = self.qa_generator.memory_bytes() if self.qa_generator is not None else 0
+        return index_bytes + self.state_bytes
+
+    @property
+    def evicted(self) -> bool:
+        return self.qa_generator is not None and self.qa_generator.released
+
+
+class SessionResourceManager:
+    """
+    Tracks the per-session resources of every Streamlit session in this process.
+
+    Each script run `touch`es its session, which reopens an evicted index. A sweeper
+    thread then, every `sweep_interval` seconds:
+    - closes sessions the Streamlit runtime no longer knows about (tab closed),
+    - releases the indexes of sessions idle for more than `idle_seconds`,
+    - and, while the total footprint exceeds `memory_budget`, releases the indexes of
+      the least recently used sessions idle for at least `min_idle_seconds`.
+    Released indexes stay on disk and come back on the session's next run. Sessions
+    with a background ingestion in progress, or whose index the script thread is
+    using, are never evicted; a closed session's index still in use is released when
+    its ingestion finishes or on a later sweep.
+    """
+
+    def __init__(self, memory_budget: int = SESSION_MEMORY_BUDGET, idle_seconds: float = SESSION_IDLE_SECONDS,
+                 sweep_interval: float = SESSION_SWEEP_SECONDS, min_idle_seconds: float = SESSION_MIN_IDLE_SECONDS,
+                 is_active=_session_is_active):
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.min_idle_seconds = min_idle_seconds
+        self.is_active = is_active
+        self.evictions = 0
+        self.restores = 0
+        self.closed_sessions = 0
+        self._sessions = {}
+        self._closing = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if sweep_interval:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def touch(self, session_id: str, user_id: str, qa_generator=None, state_bytes: int = 0, on_close=()):
+        """
+        Mark a session as active and reopen its index if it was evicted.
+
+        :param session_id: Streamlit session id.
+        :param user_id: Student the session belongs to.
+        :param qa_generator: The session's `QAGenerator`, if it has one yet.
+        :param state_bytes: Estimated size of the rest of the session state.
+        :param on_close: Callables run once the session is gone (flush writes, stop the camera).
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = SessionEntry(session_id, user_id)
+        with entry.lock:
+            entry.last_seen = time.monotonic()
+            entry.qa_generator = qa_generator or entry.qa_generator
+            entry.state_bytes = state_bytes
+            entry.on_close = list(on_close)
+            if entry.evicted:
+                started = time.perf_counter()
+                entry.qa_generator.ensure_loaded()
+                self.restores += 1
+                logger.info(f"Restored index of session {session_id} in {time.perf_counter() - started:.2f}s.")
+        return entry
+
+    def _evict(self, entry: SessionEntry, reason: str) -> bool:
+        if not entry.lock.acquire(blocking=False):
+            return False
+        qa_generator = entry.qa_generator
+        # The script thread and ingestion jobs hold the index lock while using the index;
+        # an index in use is skipped rather than released under them.
+        if qa_generator is None or not qa_generator.index_lock.acquire(blocking=False):
+            entry.lock.release()
+            return False
+        try:
+            if qa_generator.released or qa_generator.busy:
+                return False
+            qa_generator.release()
+            entry.evictions += 1
+            self.evictions += 1
+            metrics.inc("session_evictions_total", reason=reason)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to evict index of session {entry.session_id}: {e}")
+            return False
+        finally:
+            qa_generator.index_lock.release()
+            entry.lock.release()
+
+    def _close(self, entry: SessionEntry):
+        if entry.qa_generator is not None:
+            # Released now if idle, by the ingestion job when it finishes, or on a later sweep.
+            entry.qa_generator.closed = True
+            if not self._evict(entry, "closed") and not entry.qa_generator.busy and not entry.evicted:
+                with self._lock:
+                    self._closing.append(entry)
+        for callback in entry.on_close:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error closing resources of session {entry.session_id}: {e}")
+        self.closed_sessions += 1
+
+    def sweep(self):
+        """Run one eviction pass."""
+        now = time.monotonic()
+        with self._lock:
+            closing, self._closing = self._closing, []
+        for entry in closing:
+            if not self._evict(entry, "closed") and not entry.evicted:
+                with self._lock:
+                    self._closing.append(entry)
+        with self._lock:
+            entries = sorted(self._sessions.values(), key=lambda entry: entry.last_seen)
+        for entry in entries:
+            if not self.is_active(entry.session_id):
+                with self._lock:
+                    self._sessions.pop(entry.session_id, None)
+                self._close(entry)
+                logger.info(f"Closed resources of ended session {entry.session_id}.")
+            elif self.idle_seconds and now - entry.last_seen > self.idle_seconds:
+                if self._evict(entry, "idle"):
+                    logger.info(f"Evicted index of session {entry.session_id} after "
+                                f"{now - entry.last_seen:.0f}s idle.")
+
+        with self._lock:
+            entries = sorted(self._sessions.values(), key=lambda entry: entry.last_seen)
+        total = sum(entry.footprint() for entry in entries)
+        for entry in entries:
+            if total <= self.memory_budget:
+                break
+            if now - entry.last_seen < self.min_idle_seconds:
+                continue
+            footprint = entry.footprint()
+            if self._evict(entry, "budget"):
+                total -= footprint
+                logger.info(f"Evicted index of session {entry.session_id} to stay within the memory budget.")
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        """Live session counts and memory footprint."""
+        with self._lock:
+            entries = list(self._sessions.values())
+        now = time.monotonic()
+        return {
+            "sessions": len(entries),
+            "loaded": sum(1 for entry in entries if not entry.evicted),
+            "evicted": sum(1 for entry in entries if entry.evicted),
+            "idle": sum(1 for entry in entries if now - entry.last_seen > self.min_idle_seconds),
+            "footprint_bytes": sum(entry.footprint() for entry in entries),
+            "budget_bytes": self.memory_budget,
+            "rss_bytes": _rss_bytes(),
+            "evictions": self.evictions,
+            "restores": self.restores,
+            "closed_sessions": self.closed_sessions,
+        }
+
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionResourceManager:
+    """Return the process-wide session resource manager, starting it on first use."""
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            _session_manager = SessionResourceManager()
+        return _session_manager
+
+
+def current_session_manager():
+    """Return the session resource manager if it has been started, else None."""
+    return _session_manager
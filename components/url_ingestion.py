@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from logger import logger
+
+HTTP_CACHE_DIR = os.getenv("SIDEKICK_HTTP_CACHE_DIR", os.path.join("cache", "http"))
+URL_CONCURRENCY = int(os.getenv("SIDEKICK_URL_CONCURRENCY", "8"))
+URL_TIMEOUT = float(os.getenv("SIDEKICK_URL_TIMEOUT", "20"))
+MAX_URLS = int(os.getenv("SIDEKICK_MAX_URLS", "500"))
+USER_AGENT = "Sidekick-CourseAssistant/1.0"
+
+
+def parse_url_input(text: str) -> list:
+    """
+    Split free-form input (one URL per line, or separated by commas/spaces) into unique http(s) URLs.
+    """
+    urls = []
+    for candidate in re.split(r"[\s,]+", text or ""):
+        if candidate.startswith(("http://", "https://")) and candidate not in urls:
+            urls.append(candidate)
+    return urls
+
+
+def parse_sitemap(content_type: str, body: bytes):
+    """
+    Return the `<loc>` URLs of an XML sitemap and whether it is a sitemap index, or None
+    if the response is not a sitemap. Decided from the Content-Type and the root
+    element, so an HTML page such as `/sitemap.html` is indexed like any other page.
+    """
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if not media_type.endswith(("/xml", "+xml")) and not body.lstrip().startswith(b"<?xml"):
+        return None
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        return None
+    kind = root.tag.rsplit("}", 1)[-1]
+    if kind not in ("urlset", "sitemapindex"):
+        return None
+    locations = [element.text.strip() for element in root.iter() if element.tag.endswith("loc") and element.text]
+    return locations, kind == "sitemapindex"
+
+
+def html_to_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return re.sub(r"\n\s*\n+", "\n\n", soup.get_text(separator="\n")).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HTTPCache:
+    """
+    On-disk cache of fetched pages: validators (ETag / Last-Modified) used for
+    conditional requests, and the extracted text so a `304 Not Modified` can be served
+    without downloading the page again.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._index_path = os.path.join(path, "index.json")
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load HTTP cache index, starting empty: {e}")
+
+    def _text_path(self, url: str) -> str:
+        return os.path.join(self.path, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.txt")
+
+    def get(self, url: str):
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None or not os.path.exists(self._text_path(url)):
+            return None
+        return entry
+
+    def read_text(self, url: str) -> str:
+        with open(self._text_path(url), encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, url: str, text: str, etag: str = None, last_modified: str = None):
+        with open(self._text_path(url), "w", encoding="utf-8") as f:
+            f.write(text)
+        with self._lock:
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash(text),
+                "fetched_at": time.time(),
+            }
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self._index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self._index_path)
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Return the process-wide HTTP page cache."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPCache()
+        return _http_cache
+
+
+class PageResult:
+    """Outcome of fetching one URL: status is "fetched", "not_modified" or "failed"."""
+
+    def __init__(self, url: str, status: str, text: str = None, error: str = None):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.error = error
+        self.sitemap = None
+
+    @property
+    def content_hash(self):
+        return content_hash(self.text) if self.text is not None else None
+
+
+async def _fetch_page(session, semaphore, cache: HTTPCache, url: str, detect_sitemap: bool = False) -> PageResult:
+    headers = {}
+    cached = cache.get(url)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        async with semaphore:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and cached:
+                    return PageResult(url, "not_modified", text=cache.read_text(url))
+                response.raise_for_status()
+                if detect_sitemap:
+                    sitemap = parse_sitemap(response.headers.get("Content-Type"), await response.read())
+                    if sitemap is not None:
+                        result = PageResult(url, "sitemap")
+                        result.sitemap = sitemap
+                        return result
+                html = await response.text()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        text = await asyncio.to_thread(html_to_text, html)
+        await asyncio.to_thread(cache.put, url, text, etag, last_modified)
+        return PageResult(url, "fetched", text=text)
+    except Exception as e:
+        logger.error(f"Error fetching {url}: {e}")
+        return PageResult(url, "failed", error=str(e))
+
+
+async def _expand_sitemap(session, sitemap: tuple, depth: int = 0) -> list:
+    locations, is_index = sitemap
+    if not is_index:
+        return locations
+    if depth >= 1:
+        return []
+    nested = await asyncio.gather(*[_read_sitemap(session, loc, depth + 1) for loc in locations],
+                                  return_exceptions=True)
+    return [page for pages in nested if isinstance(pages, list) for page in pages]
+
+
+async def _read_sitemap(session, url: str, depth: int) -> list:
+    async with session.get(url) as response:
+        response.raise_for_status()
+        sitemap = parse_sitemap(response.headers.get("Content-Type"), await response.read())
+    if sitemap is None:
+        raise ValueError(f"{url} is not an XML sitemap")
+    return await _expand_sitemap(session, sitemap, depth)
+
+
+async def fetch_pages(urls: list, cache: HTTPCache = None, concurrency: int = URL_CONCURRENCY,
+                      timeout: float = URL_TIMEOUT) -> list:
+    """
+    Fetch pages concurrently with conditional requests.
+
+    Each given URL is fetched once; a response that turns out to be an XML sitemap is
+    expanded and the pages it lists are fetched in a second round.
+
+    :param urls: Page or sitemap URLs.
+    :param cache: HTTP cache used for validators and cached text.
+    :param concurrency: Maximum number of requests in flight.
+    :param timeout: Total timeout per request in seconds.
+    :return: List of `PageResult`.
+    """
+    import aiohttp
+    cache = cache or get_http_cache()
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={"User-Agent": USER_AGENT}
+    ) as session:
+        semaphore = asyncio.Semaphore(concurrency)
+        direct = await asyncio.gather(*[
+            _fetch_page(session, semaphore, cache, url, detect_sitemap=True)
+            for url in list(dict.fromkeys(urls))[:MAX_URLS]
+        ])
+        results = [result for result in direct if result.status != "sitemap"]
+        pages = []
+        for result in direct:
+            if result.status == "sitemap":
+                try:
+                    pages.extend(await _expand_sitemap(session, result.sitemap))
+                except Exception as e:
+                    logger.error(f"Error reading sitemap {result.url}: {e}")
+        fetched = {result.url for result in results}
+        pages = [url for url in dict.fromkeys(pages) if url not in fetched][:MAX_URLS - len(results)]
+        results += await asyncio.gather(*[_fetch_page(session, semaphore, cache, url) for url in pages])
+    cache.save()
+    return results
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from logger import logger
+
+WARMUP_ENABLED = os.getenv("SIDEKICK_WARMUP", "1") == "1"
+
+
+class WarmUp:
+    """
+    Background warm-up of the heavy parts of the app.
+
+    While the student is still on the welcome and goals pages, a daemon thread imports
+    LangChain, Chroma, pymongo and OpenCV and loads the shared models through the
+    registry. Sessions that need a model before it is ready simply wait on the
+    registry's per-model load lock instead of loading it a second time. Failures are
+    logged and left for the session to hit (and report) on first real use.
+    """
+
+    def __init__(self):
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}
+        self.errors = {}
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _step(self, name: str, func):
+        started = time.perf_counter()
+        try:
+            func()
+            self.steps[name] = time.perf_counter() - started
+        except Exception as e:
+            self.errors[name] = str(e)
+            logger.error(f"Warm-up step '{name}' failed: {e}")
+
+    def run(self):
+        def import_modules():
+            import components.qa_generator  # noqa: F401  (LangChain, Chroma)
+            import components.llm  # noqa: F401
+            import database_mongodb  # noqa: F401
+            import cv2  # noqa: F401
+
+        def load_embeddings():
+            from components.model_registry import get_embeddings
+            get_embeddings().embed_query("warm up")
+
+        def load_qa_llm():
+            from components.model_registry import get_qa_llm
+            from components.qa_generator import hf_token
+            token = hf_token()
+            if token:
+                get_qa_llm(token)
+
+        def load_chat_llm():
+            from components.http_transport import get_transport
+            from components.model_registry import get_ollama_llm
+            get_transport()
+            get_ollama_llm()
+
+        self.started_at = self.started_at or time.time()
+        for name, func in (("imports", import_modules), ("embeddings", load_embeddings),
+                           ("qa_llm", load_qa_llm), ("chat_llm", load_chat_llm)):
+            self._step(name, func)
+        self.finished_at = time.time()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.1f}s.")
+
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def start_warmup():
+    """
+    Start the process-wide warm-up once; returns the `WarmUp`, or None when disabled
+    with `SIDEKICK_WARMUP=0`.
+    """
+    global _warmup
+    if not WARMUP_ENABLED:
+        return None
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = WarmUp().start()
+        return _warmup
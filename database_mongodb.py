@@ -1,15 +1,365 @@
 import pymongo
 from pymongo import MongoClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.monitoring import ConnectionPoolListener
 from datetime import datetime, timedelta
+from collections import deque
 from logger import logger
+from metrics import metrics
+import atexit
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+WRITE_BATCH_SIZE = int(os.getenv("EMOTION_WRITE_BATCH_SIZE", "100"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("EMOTION_WRITE_FLUSH_INTERVAL", "2.0"))
+WRITE_MAX_PENDING = int(os.getenv("EMOTION_WRITE_MAX_PENDING", "10000"))
+EMOTION_RETENTION_DAYS = float(os.getenv("EMOTION_RETENTION_DAYS", "30"))
+# Granularity -> retention in days of its rollup collection (None keeps it forever).
+ROLLUP_RETENTION_DAYS = {"minute": 7, "hour": 180, "day": None}
+DUPLICATE_KEY_ERROR = 11000
+
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "10000"))
+# "1", "majority", ...; emotion samples are cheap to lose, so acknowledged writes are enough by default.
+MONGODB_WRITE_CONCERN = os.getenv("MONGODB_WRITE_CONCERN", "1")
+MONGODB_WRITE_TIMEOUT_MS = int(os.getenv("MONGODB_WRITE_TIMEOUT_MS", "5000"))
+
+
+class ConnectionStats(ConnectionPoolListener):
+    """
+    Connection pool listener counting the connections opened, in use and failing
+    across every client that registers it.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failures = 0
+        self.pools_cleared = 0
+        self._lock = threading.Lock()
+
+    def _count(self, attribute: str, metric: str = None):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+        if metric:
+            metrics.inc(metric)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pools_cleared", "mongo_pool_cleared_total")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("created", "mongo_connections_created_total")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("closed", "mongo_connections_closed_total")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failures", "mongo_checkout_failures_total")
+
+    def connection_checked_out(self, event):
+        self._count("checked_out")
+
+    def connection_checked_in(self, event):
+        self._count("checked_in")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "in_use": self.checked_out - self.checked_in,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failures": self.checkout_failures,
+                "pools_cleared": self.pools_cleared,
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+def _client_options() -> dict:
+    write_concern = int(MONGODB_WRITE_CONCERN) if MONGODB_WRITE_CONCERN.isdigit() else MONGODB_WRITE_CONCERN
+    return {
+        "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": MONGODB_MIN_POOL_SIZE,
+        "connectTimeoutMS": MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGODB_SOCKET_TIMEOUT_MS,
+        "w": write_concern,
+        "wTimeoutMS": MONGODB_WRITE_TIMEOUT_MS,
+        "event_listeners": [connection_stats],
+    }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_mongo_client(uri: str = os.getenv("MONGODB_URI")) -> MongoClient:
+    """
+    Return the process-wide pooled `MongoClient` for `uri`.
+
+    Every session and `EmotionDatabase` shares it, so the process keeps one connection
+    pool (bounded by `MONGODB_MAX_POOL_SIZE`) and one set of monitor threads per
+    cluster. The client is closed at interpreter exit.
+    """
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = _clients[uri] = MongoClient(uri, **_client_options())
+            atexit.register(client.close)
+        return client
+
+
+def mongo_connection_stats() -> dict:
+    """Connection counts across the shared clients."""
+    return connection_stats.stats()
+
+
+def _truncate_bucket(timestamp: datetime, granularity: str) -> datetime:
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        timestamp = timestamp.replace(minute=0)
+    if granularity == "day":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def rollup_operations(records, granularity: str) -> list:
+    """
+    Build the `$inc` upserts adding `records` to the rollup of `granularity`.
+    Records are pre-aggregated per bucket so a batch costs one update per bucket.
+    """
+    increments = {}
+    for record in records:
+        key = (record["user"], _truncate_bucket(record["timestamp"], granularity))
+        counts = increments.setdefault(key, {})
+        counts[f"counts.{record['emotion']}"] = counts.get(f"counts.{record['emotion']}", 0) + 1
+        counts["total"] = counts.get("total", 0) + 1
+    return [
+        UpdateOne({"user": user, "bucket": bucket}, {"$inc": counts}, upsert=True)
+        for (user, bucket), counts in increments.items()
+    ]
+
+
+def apply_rollups(rollups: dict, records):
+    """
+    Add written emotion records to the minute/hour/day rollups with `$inc` upserts.
+
+    :param rollups: Rollup collections by granularity.
+    :param records: Emotion records that were just written.
+    """
+    for granularity, rollup in rollups.items():
+        operations = rollup_operations(records, granularity)
+        if operations:
+            with metrics.span("mongo_write", op="rollup", granularity=granularity):
+                rollup.bulk_write(operations, ordered=False)
+
+
+class BufferedEmotionWriter:
+    """
+    Write-behind buffer for emotion records.
+
+    Records are queued in memory and written by a background thread with unordered
+    `insert_many` once `batch_size` records are waiting or `flush_interval` seconds have
+    passed. If MongoDB is unreachable the batch goes back to the front of the queue and
+    is retried with exponential backoff; the queue is bounded by `max_pending`, beyond
+    which the oldest records are dropped. `on_written` is called with the records of
+    every successful write.
+
+    One writer is shared by every session writing to a collection (see
+    `get_emotion_writer`), so records of all students are batched together.
+    """
+
+    def __init__(self, collection, batch_size: int = WRITE_BATCH_SIZE, flush_interval: float = WRITE_FLUSH_INTERVAL,
+                 max_pending: int = WRITE_MAX_PENDING, on_written=None):
+        self.collection = collection
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._backoff = 0.0
+        self._thread = threading.Thread(target=self._run, name="emotion-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, record: dict):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Emotion writer is closed.")
+            self._pending.append(record)
+            if len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                metrics.inc("emotions_dropped_total")
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + max(self.flush_interval, self._backoff)
+                while not self._closed:
+                    if not self._backoff and len(self._pending) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Write everything currently queued.
+
+        :return: True if the queue was fully written.
+        """
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    return True
+                if not self._write(batch):
+                    return False
+
+    def _write(self, batch: list) -> bool:
+        started = time.perf_counter()
+        retry = []
+        try:
+            with metrics.span("mongo_write", op="insert_many"):
+                self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            retry_indexes = {index for index, error in failed.items() if error.get("code") != DUPLICATE_KEY_ERROR}
+            retry = [batch[index] for index in sorted(retry_indexes)]
+            batch = [record for index, record in enumerate(batch) if index not in retry_indexes]
+            logger.error(f"Bulk insert of emotions partially failed; retrying {len(retry)} records.")
+        except PyMongoError as e:
+            retry = batch
+            batch = []
+            logger.error(f"Error inserting emotions into MongoDB, will retry: {e}")
+
+        self.last_flush_seconds = time.perf_counter() - started
+        self.written += len(batch)
+        metrics.inc("emotions_written_total", len(batch))
+        if batch and self.on_written is not None:
+            try:
+                self.on_written(batch)
+            except Exception as e:
+                logger.error(f"Error in emotion write callback: {e}")
+        if retry:
+            self.failed_flushes += 1
+            self._backoff = min(max(self._backoff * 2, 1.0), 60.0)
+            with self._cond:
+                self._pending.extendleft(reversed(retry))
+                while len(self._pending) > self.max_pending:
+                    self._pending.popleft()
+                    self.dropped += 1
+                    metrics.inc("emotions_dropped_total")
+            return False
+        self._backoff = 0.0
+        logger.debug("Flushed %d emotions to MongoDB in %.1f ms.", len(batch), self.last_flush_seconds * 1000)
+        return True
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Stop the background thread and make a final attempt to write what is queued."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        if not self.flush():
+            logger.error(f"Closed emotion writer with {self.queue_depth} unwritten records.")
+
+_writers = {}
+_writers_lock = threading.Lock()
+_index_builds = {}
+_index_builds_lock = threading.Lock()
+
+
+def get_emotion_writer(client, db_name: str, collection_name: str) -> BufferedEmotionWriter:
+    """
+    Return the process-wide write-behind buffer for a collection, which also maintains
+    its rollups. It is closed (and flushed) at interpreter exit.
+    """
+    key = (id(client), db_name, collection_name)
+    with _writers_lock:
+        entry = _writers.get(key)
+        if entry is None:
+            db = client[db_name]
+            rollups = {
+                granularity: db[f"{collection_name}_rollup_{granularity}"]
+                for granularity in ROLLUP_RETENTION_DAYS
+            }
+            writer = BufferedEmotionWriter(db[collection_name], on_written=lambda records: apply_rollups(rollups, records))
+            # Keep the client referenced so its id is not reused while the writer lives.
+            entry = _writers[key] = (client, writer)
+        return entry[1]
+
+
 class EmotionDatabase:
-    def __init__(self, uri=os.getenv("MONGODB_URI"), db_name="study_buddy", collection_name="emotions"):
-        if not uri:
+    def __init__(self, uri=os.getenv("MONGODB_URI"), db_name="study_buddy", collection_name="emotions", buffered=True,
+                 user_id="default", retention_days=EMOTION_RETENTION_DAYS, client=None):
+        """
+        :param uri: MongoDB connection string; the shared pooled client for it is used.
+        :param client: Use this client instead of the shared one.
+        """
+        self.writer = None
+        self.user_id = user_id
+        self.retention_days = retention_days
+        self.rollups = {}
+        if not uri and client is None:
             logger.error("MONGODB_URI is not set in environment variables.")
             self.client = None
             self.db = None
@@ -17,9 +367,16 @@ class EmotionDatabase:
             return
 
         try:
-            self.client = MongoClient(uri)
+            self.client = client if client is not None else get_mongo_client(uri)
             self.db = self.client[db_name]
             self.collection = self.db[collection_name]
+            self.rollups = {
+                granularity: self.db[f"{collection_name}_rollup_{granularity}"]
+                for granularity in ROLLUP_RETENTION_DAYS
+            }
+            self._ensure_indexes()
+            if buffered:
+                self.writer = get_emotion_writer(self.client, db_name, collection_name)
             logger.info("Connected to MongoDB successfully.")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
@@ -27,20 +384,91 @@ class EmotionDatabase:
             self.db = None
             self.collection = None
 
+    def _ensure_indexes(self):
+        """
+        Create the indexes once per process and collection, on a background thread so
+        an unreachable server does not block the session. Until they exist queries are
+        only slower; if creating them fails the next session tries again.
+        """
+        key = (id(self.client), self.db.name, self.collection.name, self.retention_days)
+        with _index_builds_lock:
+            if key in _index_builds:
+                return
+            _index_builds[key] = self.client
+
+        def build():
+            if not self._create_indexes():
+                with _index_builds_lock:
+                    _index_builds.pop(key, None)
+
+        threading.Thread(target=build, name="emotion-indexes", daemon=True).start()
+
+    def _create_indexes(self) -> bool:
+        """
+        Create the (user, timestamp) index used by every windowed query and a TTL index
+        that expires raw emotion records after `retention_days`.
+
+        :return: True if all indexes exist.
+        """
+        try:
+            self.collection.create_index(
+                [("user", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)],
+                name="user_timestamp"
+            )
+            if self.retention_days:
+                self.collection.create_index(
+                    "timestamp",
+                    name="timestamp_ttl",
+                    expireAfterSeconds=int(self.retention_days * 24 * 3600)
+                )
+            for granularity, rollup in self.rollups.items():
+                rollup.create_index(
+                    [("user", pymongo.ASCENDING), ("bucket", pymongo.ASCENDING)],
+                    name="user_bucket",
+                    unique=True
+                )
+                retention_days = ROLLUP_RETENTION_DAYS[granularity]
+                if retention_days:
+                    rollup.create_index(
+                        "bucket",
+                        name="bucket_ttl",
+                        expireAfterSeconds=int(retention_days * 24 * 3600)
+                    )
+            return True
+        except PyMongoError as e:
+            logger.error(f"Failed to create emotion indexes: {e}")
+            return False
+
+    @staticmethod
+    def _truncate(timestamp: datetime, granularity: str) -> datetime:
+        return _truncate_bucket(timestamp, granularity)
+
+    def _apply_rollups(self, records):
+        apply_rollups(self.rollups, records)
+
     def insert_emotion(self, emotion):
         """
         Insert a detected emotion with a timestamp into the MongoDB collection.
+        When buffered, the record is queued and written in the background.
         
         :param emotion: Detected emotion as a string.
         """
         if self.collection is not None:
             try:
                 emotion_record = {
+                    "user": self.user_id,
                     "timestamp": datetime.utcnow(),
                     "emotion": emotion
                 }
-                self.collection.insert_one(emotion_record)
-                logger.debug(f"Inserted emotion '{emotion}' into MongoDB.")
+                if self.writer is not None:
+                    self.writer.add(emotion_record)
+                    logger.debug("Queued emotion '%s' for MongoDB.", emotion)
+                    return
+                with metrics.span("mongo_write", op="insert_one"):
+                    self.collection.insert_one(emotion_record)
+                metrics.inc("emotions_written_total")
+                self._apply_rollups([emotion_record])
+                logger.debug("Inserted emotion '%s' into MongoDB.", emotion)
             except Exception as e:
                 logger.error(f"Error inserting emotion into MongoDB: {e}")
         else:
@@ -56,7 +484,10 @@ class EmotionDatabase:
         if self.collection is not None:
             try:
                 time_threshold = datetime.utcnow() - timedelta(minutes=minutes)
-                emotions_cursor = self.collection.find({"timestamp": {"$gte": time_threshold}})
+                emotions_cursor = self.collection.find(
+                    {"user": self.user_id, "timestamp": {"$gte": time_threshold}},
+                    {"_id": 0, "emotion": 1}
+                )
                 emotions = [doc['emotion'] for doc in emotions_cursor]
                 logger.debug(f"Retrieved {len(emotions)} emotions from the last {minutes} minutes.")
                 return emotions
@@ -67,10 +498,69 @@ class EmotionDatabase:
             logger.error("MongoDB collection is not initialized.")
             return []
 
+    def get_recent_emotion_records(self, minutes=5):
+        """
+        Retrieve (timestamp, emotion) pairs detected in the last 'minutes' minutes.
+        
+        :param minutes: Time window in minutes.
+        :return: List of (timestamp, emotion) tuples.
+        """
+        if self.collection is not None:
+            try:
+                time_threshold = datetime.utcnow() - timedelta(minutes=minutes)
+                cursor = self.collection.find(
+                    {"user": self.user_id, "timestamp": {"$gte": time_threshold}},
+                    {"_id": 0, "timestamp": 1, "emotion": 1}
+                )
+                return [(doc["timestamp"], doc["emotion"]) for doc in cursor]
+            except Exception as e:
+                logger.error(f"Error fetching recent emotion records from MongoDB: {e}")
+                return []
+        else:
+            logger.error("MongoDB collection is not initialized.")
+            return []
+
+    def get_mood_history(self, granularity="hour", start=None, end=None):
+        """
+        Read pre-aggregated emotion counts from the rollup collections.
+        
+        :param granularity: One of "minute", "hour" or "day".
+        :param start: Earliest bucket (naive UTC datetime), defaults to 7 days ago.
+        :param end: Latest bucket (naive UTC datetime), defaults to now.
+        :return: List of {"bucket", "counts", "total"} dicts sorted by bucket.
+        """
+        if granularity not in ROLLUP_RETENTION_DAYS:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        if self.collection is None:
+            logger.error("MongoDB collection is not initialized.")
+            return []
+        start = start or datetime.utcnow() - timedelta(days=7)
+        end = end or datetime.utcnow()
+        try:
+            cursor = self.rollups[granularity].find(
+                {"user": self.user_id, "bucket": {"$gte": self._truncate(start, granularity), "$lte": end}},
+                {"_id": 0, "bucket": 1, "counts": 1, "total": 1}
+            ).sort("bucket", pymongo.ASCENDING)
+            history = list(cursor)
+            logger.debug(f"Retrieved {len(history)} {granularity} mood buckets.")
+            return history
+        except Exception as e:
+            logger.error(f"Error fetching mood history from MongoDB: {e}")
+            return []
+
+    def write_stats(self) -> dict:
+        """
+        Return queue depth and flush statistics of the shared write-behind buffer.
+        """
+        if self.writer is None:
+            return {}
+        return self.writer.stats()
+
     def close_connection(self):
         """
-        Close the MongoDB connection.
+        Flush queued emotions. The shared client and writer stay open for the other
+        sessions and are closed at interpreter exit.
         """
-        if self.client:
-            self.client.close()
-            logger.debug("Closed MongoDB connection.")
\ No newline at end of file
+        if self.writer is not None:
+            self.writer.flush()
+        logger.debug("Closed emotion database of user '%s'.", self.user_id)
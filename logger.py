@@ -1,11 +1,103 @@
 # logger.py
 
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_LEVEL = os.getenv("SIDEKICK_LOG_LEVEL", "DEBUG").upper()
+LOG_MAX_CHARS = int(os.getenv("SIDEKICK_LOG_MAX_CHARS", "500"))
+LOG_QUEUE_SIZE = int(os.getenv("SIDEKICK_LOG_QUEUE_SIZE", "10000"))
+
+
+def truncate(text: str, limit: int = LOG_MAX_CHARS) -> str:
+    """Shorten `text` to `limit` characters, noting how much was cut."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class TruncatingFormatter(logging.Formatter):
+    """Formatter that caps the rendered message at `max_chars` (prompts, completions, payloads)."""
+
+    def __init__(self, fmt=None, max_chars: int = LOG_MAX_CHARS, **kwargs):
+        super().__init__(fmt, **kwargs)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record):
+        # `record.message` is re-rendered by every `format` call, so records shared
+        # between handlers are never truncated twice.
+        record.message = truncate(record.message, self.max_chars)
+        return super().formatMessage(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-call-site rate limiting and sampling for high-frequency messages.
+
+    A record logged with `extra={"throttle": seconds}` passes at most once per
+    `seconds` from the same call site, and the next one that passes reports how many
+    were suppressed. `extra={"sample": n}` keeps one record in every `n`. Records
+    without either attribute are not affected.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        throttle = getattr(record, "throttle", None)
+        sample = getattr(record, "sample", None)
+        if not throttle and not sample:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.setdefault(site, {"last": None, "seen": 0, "suppressed": 0})
+            state["seen"] += 1
+            allowed = True
+            if sample and (state["seen"] - 1) % sample:
+                allowed = False
+            if allowed and throttle and state["last"] is not None and now - state["last"] < throttle:
+                allowed = False
+            if not allowed:
+                state["suppressed"] += 1
+                return False
+            state["last"] = now
+            suppressed, state["suppressed"] = state["suppressed"], 0
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the logging thread.
+
+    Records are enqueued unformatted, so message interpolation happens on the listener
+    thread, and are dropped (and counted) if the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 
 logger = logging.getLogger("study_buddy_logger")
-logger.setLevel(logging.DEBUG)  
+logger.setLevel(LOG_LEVEL)
 
 if not os.path.exists("logs"):
     os.makedirs("logs")
@@ -16,9 +108,16 @@ file_handler.setLevel(logging.DEBUG)
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+formatter = TruncatingFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 console_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
\ No newline at end of file
+# File and console I/O happen on the listener thread; callers only enqueue records.
+queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+queue_handler.addFilter(RateLimitFilter())
+listener = QueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+
+if not logger.handlers:
+    logger.addHandler(queue_handler)
+    listener.start()
+    atexit.register(listener.stop)
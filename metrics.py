@@ -0,0 +1,255 @@
+# metrics.py
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logger import logger
+
+METRICS_ENABLED = os.getenv("SIDEKICK_METRICS", "0") == "1"
+METRICS_PORT = int(os.getenv("SIDEKICK_METRICS_PORT", "0"))
+METRICS_JSON_PATH = os.getenv("SIDEKICK_METRICS_JSON")
+METRICS_JSON_INTERVAL = float(os.getenv("SIDEKICK_METRICS_JSON_INTERVAL", "60"))
+METRICS_PREFIX = "sidekick_"
+# Upper bounds in seconds, from sub-millisecond cache hits to multi-minute ingestions.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative.append((bound, running))
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms.
+
+    `span(name, **labels)` times a block into the `<name>_seconds` histogram and counts
+    exceptions in `<name>_errors_total`; `timed(name)` does the same for a function.
+    When disabled every call returns immediately (spans are a shared no-op context
+    manager), so instrumented hot paths pay a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Increase the counter `name` by `value`.
+
+        :param name: Counter name, conventionally ending in `_total`.
+        :param labels: Label values distinguishing series of the same counter.
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Record `value` in the histogram `name`.
+
+        :param name: Histogram name, conventionally ending in `_seconds`.
+        :param labels: Label values distinguishing series of the same histogram.
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def span(self, name: str, **labels):
+        """
+        Context manager timing the enclosed block.
+
+        :param name: Span name; recorded as `<name>_seconds`.
+        :param labels: Label values, e.g. `stage="embed"`.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name: str, labels: dict):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator timing every call of the wrapped function as a span."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """Return every counter and histogram as JSON-serialisable data."""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), **histogram.snapshot()}
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+        for histogram in histograms:
+            histogram["buckets"] = [["+Inf" if bound == float("inf") else bound, count]
+                                    for bound, count in histogram["buckets"]]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def prometheus_text(self) -> str:
+        """Render the current values in the Prometheus text exposition format."""
+        def render_labels(labels: dict) -> str:
+            if not labels:
+                return ""
+            pairs = []
+            for key, value in labels.items():
+                value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                pairs.append(f'{key}="{value}"')
+            return "{" + ",".join(pairs) + "}"
+
+        snapshot = self.snapshot()
+        lines, declared = [], set()
+        for counter in snapshot["counters"]:
+            name = METRICS_PREFIX + counter["name"]
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{render_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            name = METRICS_PREFIX + histogram["name"]
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            for bound, count in histogram["buckets"]:
+                lines.append(f"{name}_bucket{render_labels({**histogram['labels'], 'le': bound})} {count}")
+            lines.append(f"{name}_sum{render_labels(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{render_labels(histogram['labels'])} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def start_http_exporter(port: int = METRICS_PORT) -> ThreadingHTTPServer:
+    """
+    Serve `metrics` in Prometheus text format on `http://<host>:<port>/metrics`.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logger.info(f"Serving metrics on port {server.server_address[1]}.")
+    return server
+
+
+def start_json_exporter(path: str = METRICS_JSON_PATH, interval: float = METRICS_JSON_INTERVAL) -> threading.Thread:
+    """
+    Write a JSON snapshot of `metrics` to `path` every `interval` seconds.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(metrics.snapshot(), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error(f"Failed to write metrics snapshot to '{path}': {e}")
+
+    thread = threading.Thread(target=run, name="metrics-json-exporter", daemon=True)
+    thread.start()
+    return thread
+
+
+_exporters = None
+_exporters_lock = threading.Lock()
+
+
+def start_exporters() -> dict:
+    """
+    Start the exporters configured through `SIDEKICK_METRICS_PORT` and
+    `SIDEKICK_METRICS_JSON`, once per process; later calls return the running ones.
+    Does nothing while metrics are disabled.
+    """
+    global _exporters
+    with _exporters_lock:
+        if _exporters is not None:
+            return _exporters
+        _exporters = {}
+        if metrics.enabled:
+            if METRICS_PORT:
+                _exporters["http"] = start_http_exporter(METRICS_PORT)
+            if METRICS_JSON_PATH:
+                _exporters["json"] = start_json_exporter(METRICS_JSON_PATH, METRICS_JSON_INTERVAL)
+        return _exporters